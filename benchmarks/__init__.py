@@ -0,0 +1,3 @@
+"""
+Benchmarks of parsepy, run with python -m benchmarks.
+"""
@@ -0,0 +1,131 @@
+"""
+Generated inputs and grammars of a given size for the benchmarks.
+"""
+
+from __future__ import annotations
+from typing import Dict, Tuple
+
+import random
+
+from parsepy.lexer import Lexer
+from parsepy.parser import CFG, LL1
+
+TOKENS = {
+    "t_plus": r"\+",
+    "t_mult": r"\*",
+    "t_lparen": r"\(",
+    "t_rparen": r"\)",
+    "t_id": r"[A-Za-z_]\w*",
+    "t_ws": r"[ \t\n]+",
+}
+
+GRAMMAR = """E  -> T E'
+             E' -> t_mult T E' | ε
+             T  -> F T'
+             T' -> t_plus F T' |
+             F  -> t_lparen E t_rparen | t_id"""
+
+IDS = {'A': 1, 'B': 2, 'X': 4, 'C': 0}
+
+
+def op(token, a: int, b: int) -> int:
+    # Kept small so big inputs don't time integer arithmetic
+    return (a + b if token.text == '+' else a * b) % 1000003
+
+
+ACTIONS = {
+    0: lambda vals: op(vals[2][0], vals[1], vals[2][1]) if vals[2] else vals[1],
+    1: lambda vals: (vals[1], op(vals[3][0], vals[2], vals[3][1]) if vals[3] else vals[2]),
+    2: lambda vals: None,
+    3: lambda vals: op(vals[2][0], vals[1], vals[2][1]) if vals[2] else vals[1],
+    4: lambda vals: (vals[1], op(vals[3][0], vals[2], vals[3][1]) if vals[3] else vals[2]),
+    5: lambda vals: None,
+    6: lambda vals: vals[2],
+    7: lambda vals: IDS.get(vals[1].text, 3),
+}
+
+
+def expression_parser() -> LL1:
+    """
+
+    :return: parser of the expression grammar
+    """
+
+    return LL1(Lexer(TOKENS, {"t_ws": lambda text: None}), CFG.parse(GRAMMAR), ACTIONS)
+
+
+def expression(size: int, seed: int = 0) -> str:
+    """
+    Flat expression of about size tokens, with parentheses nested at most a few levels.
+
+    :param size:
+    :param seed:
+    :return:
+    """
+
+    rand = random.Random(seed)
+    parts = []
+    depth = 0
+    count = 0
+    while count < size:
+        if depth < 3 and rand.random() < 0.1:
+            parts += ["("]
+            depth += 1
+            count += 1
+            continue
+        parts += [rand.choice("ABXC")]
+        count += 1
+        if depth and rand.random() < 0.2:
+            parts += [")"]
+            depth -= 1
+            count += 1
+        parts += [rand.choice(["+", " * ", "\n+ "])]
+        count += 1
+    parts += ["A"] + [")"] * depth
+    return "".join(parts)
+
+
+def nested(depth: int) -> str:
+    """
+    Expression nested depth parentheses deep.
+
+    :param depth:
+    :return:
+    """
+
+    return "(" * depth + "A" + "+B)" * depth
+
+
+def grammar(rules: int) -> Tuple[Dict[str, str], str]:
+    """
+    LL(1) grammar of statements with one keyword per statement kind, having about 3 * rules productions.
+
+    :param rules: number of statement kinds
+    :return: (token patterns, CFG string)
+    """
+
+    tokens = {"k{}".format(n): r"k{}\b".format(n) for n in range(rules)}
+    tokens.update({"t_id": r"[a-z_]+", "t_semi": ";", "t_ws": r"\s+"})
+    lines = ["S -> Stmt S | ε", "Stmt -> " + " | ".join("k{0} Args{0} t_semi".format(n) for n in range(rules))]
+    lines += ["Args{0} -> t_id Args{0} | ε".format(n) for n in range(rules)]
+    return tokens, "\n".join(lines)
+
+
+def statements(rules: int, size: int, seed: int = 0) -> str:
+    """
+    Text of about size tokens in the language of grammar(rules).
+
+    :param rules:
+    :param size:
+    :param seed:
+    :return:
+    """
+
+    rand = random.Random(seed)
+    parts = []
+    count = 0
+    while count < size:
+        args = rand.randrange(4)
+        parts += ["k{} {};".format(rand.randrange(rules), " ".join("abc" for _ in range(args)))]
+        count += args + 2
+    return "\n".join(parts)
@@ -0,0 +1,232 @@
+"""
+Times parsepy on inputs and grammars of growing size and reports how each benchmark scales.
+
+    python -m benchmarks [--quick] [--only NAME ...] [--save FILE] [--baseline FILE]
+
+For each benchmark, the slope of log(time) against log(size) is fitted: about 1 is linear, and a slope above
+1 + tolerance is flagged as superlinear. With --baseline, results saved by an earlier --save are compared too, and
+benchmarks that got slower or scale worse are flagged. The exit status is 1 if anything was flagged.
+"""
+
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import argparse
+import gc
+import json
+import math
+import sys
+import time
+import tracemalloc
+
+from parsepy.lexer import Lexer
+from parsepy.parser import CFG, LL1
+
+from benchmarks import inputs
+
+
+class Benchmark:
+    """
+    One timed operation over a series of sizes.
+
+    setup(size) makes the arguments outside of the timing, and run(*args) is the operation measured.
+    """
+
+    def __init__(self, name: str, sizes: List[int], setup: Callable[[int], Tuple], run: Callable[..., Any]):
+        """
+
+        :param name:
+        :param sizes: sizes in increasing order
+        :param setup: builds the arguments of run for a size
+        :param run: operation timed
+        """
+
+        self.name = name
+        self.sizes = sizes
+        self.setup = setup
+        self.run = run
+
+    def measure(self, size: int, repeat: int) -> Dict[str, float]:
+        """
+        Best time of repeat runs, and peak memory of one more run traced by tracemalloc.
+
+        :param size:
+        :param repeat:
+        :return: {"size", "time", "peak"}, time in seconds and peak in bytes
+        """
+
+        best = math.inf
+        for _ in range(repeat):
+            args = self.setup(size)
+            gc.collect()
+            start = time.perf_counter()
+            self.run(*args)
+            best = min(best, time.perf_counter() - start)
+            del args
+        args = self.setup(size)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            self.run(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {"size": size, "time": best, "peak": peak}
+
+
+def slope(points: List[Dict[str, float]], key: str) -> Optional[float]:
+    """
+    Least-squares slope of log(key) against log(size).
+
+    :param points: measurements
+    :param key: "time" or "peak"
+    :return: the slope, or None with fewer than two usable points
+    """
+
+    xy = [(math.log(p["size"]), math.log(p[key])) for p in points if p["size"] > 0 and p[key] > 0]
+    if len(xy) < 2:
+        return None
+    mx = sum(x for x, _ in xy) / len(xy)
+    my = sum(y for _, y in xy) / len(xy)
+    var = sum((x - mx) ** 2 for x, _ in xy)
+    if not var:
+        return None
+    return sum((x - mx) * (y - my) for x, y in xy) / var
+
+
+def benchmarks(quick: bool) -> List[Benchmark]:
+    """
+
+    :param quick: use smaller sizes
+    :return: the benchmarks, in the order they are run
+    """
+
+    scale = 1 if quick else 4
+    tokens = [n * scale for n in (2500, 5000, 10000, 20000)]
+    depths = [n * scale for n in (250, 500, 1000, 2000)]
+    rules = [n * scale for n in (10, 20, 40, 80)]
+    parser = inputs.expression_parser()
+
+    def tokenize(size: int) -> Tuple:
+        return parser.lexer, inputs.expression(size)
+
+    def fresh_cfg(size: int) -> Tuple:
+        return CFG.parse(inputs.grammar(size)[1]),
+
+    def analyze(cfg: CFG):
+        for rule in cfg.rules:
+            cfg.first(rule)
+            cfg.follow(rule)
+        for prod in cfg.productions:
+            cfg.select(prod)
+
+    def table(size: int) -> Tuple:
+        patterns, grammar = inputs.grammar(size)
+        return Lexer(patterns, {"t_ws": lambda text: None}), CFG.parse(grammar)
+
+    def statements(size: int) -> Tuple:
+        lexer, cfg = table(20)
+        return LL1(lexer, cfg), inputs.statements(20, size)
+
+    def parse(size: int) -> Tuple:
+        return parser, inputs.expression(size)
+
+    def parse_nested(size: int) -> Tuple:
+        return parser, inputs.nested(size)
+
+    def tree(size: int) -> Tuple:
+        return parser.parse(inputs.expression(size)),
+
+    def tree_nested(size: int) -> Tuple:
+        return parser.parse(inputs.nested(size)),
+
+    return [
+        Benchmark("lexer.tokenize", tokens, tokenize, lambda lexer, text: sum(1 for _ in lexer.tokenize(text))),
+        Benchmark("cfg.first_follow_select", rules, fresh_cfg, analyze),
+        Benchmark("ll1.table", rules, table, LL1),
+        Benchmark("ll1.parse", tokens, parse, lambda parser, text: parser.parse(text)),
+        Benchmark("ll1.parse.statements", tokens, statements, lambda parser, text: parser.parse(text)),
+        Benchmark("ll1.parse.nested", depths, parse_nested, lambda parser, text: parser.parse(text)),
+        Benchmark("ast.eval", tokens, tree, lambda tree: tree.eval()),
+        Benchmark("ast.eval.nested", depths, tree_nested, lambda tree: tree.eval()),
+    ]
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            slowdown: float) -> List[str]:
+    """
+
+    :param result: this run's result of the benchmark
+    :param baseline: saved result of the benchmark
+    :param tolerance: allowed increase of the time slope
+    :param slowdown: allowed ratio of times at the largest size measured by both
+    :return: reasons to flag the benchmark
+    """
+
+    flags = []
+    old = {p["size"]: p for p in baseline["points"]}
+    common = [p for p in result["points"] if p["size"] in old]
+    if common:
+        point = common[-1]
+        ratio = point["time"] / old[point["size"]]["time"]
+        if ratio > slowdown:
+            flags += ["{:.2f}x slower than baseline at size {}".format(ratio, point["size"])]
+    if result["slope"] is not None and baseline.get("slope") is not None \
+            and result["slope"] > baseline["slope"] + tolerance:
+        flags += ["scales as n^{:.2f}, baseline n^{:.2f}".format(result["slope"], baseline["slope"])]
+    return flags
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+
+    :param argv:
+    :return: exit status
+    """
+
+    args = argparse.ArgumentParser("python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    args.add_argument("--quick", action="store_true", help="smaller sizes")
+    args.add_argument("--only", nargs="+", metavar="NAME", help="benchmarks whose names start with NAME")
+    args.add_argument("--repeat", type=int, default=3, help="runs per size, the best is kept")
+    args.add_argument("--tolerance", type=float, default=0.25, help="allowed time slope above 1, or above baseline")
+    args.add_argument("--slowdown", type=float, default=1.5, help="allowed time ratio to the baseline")
+    args.add_argument("--save", metavar="FILE", help="write the results as JSON")
+    args.add_argument("--baseline", metavar="FILE", help="compare with results written by --save")
+    args = args.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+
+    results = {}
+    flagged = False
+    for bench in benchmarks(args.quick):
+        if args.only and not any(bench.name.startswith(name) for name in args.only):
+            continue
+        points = [bench.measure(size, args.repeat) for size in bench.sizes]
+        result = results[bench.name] = {"points": points, "slope": slope(points, "time"),
+                                        "peak_slope": slope(points, "peak")}
+        print(bench.name)
+        for point in points:
+            print("  {:>8}  {:>10.2f} ms  {:>10.1f} KiB".format(point["size"], point["time"] * 1000,
+                                                                point["peak"] / 1024))
+        flags = []
+        if result["slope"] is not None and result["slope"] > 1 + args.tolerance:
+            flags += ["superlinear"]
+        if bench.name in baseline:
+            flags += compare(result, baseline[bench.name], args.tolerance, args.slowdown)
+        print("  time ~ n^{}  memory ~ n^{}{}".format(
+            "?" if result["slope"] is None else "{:.2f}".format(result["slope"]),
+            "?" if result["peak_slope"] is None else "{:.2f}".format(result["peak_slope"]),
+            "".join("  FLAG: " + flag for flag in flags)))
+        flagged = flagged or bool(flags)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"python": sys.version, "results": results}, file, indent=1)
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1 @@
-from parsepy import lexer, parser
\ No newline at end of file
+from parsepy import lexer, parser, observer
\ No newline at end of file
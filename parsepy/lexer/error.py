@@ -24,6 +24,7 @@ class RegexError(LexerError):
         :param pos:
         """
 
+        self.msg = msg
         self.token = token
         self.pattern = regex
         self.pos = pos
@@ -3,11 +3,22 @@
 """
 
 from __future__ import annotations
-from typing import Hashable, Dict, Any, Optional, Tuple, Callable, Iterator
+from typing import Hashable, Dict, Any, Optional, Tuple, Callable, Iterator, Iterable, List, Union, IO
 
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from os import PathLike
 
+import codecs
+import importlib
+import mmap
+import pickle
+
 from ..lexer import error
+from ..observer import Observer
+from ..lexer.scanner import Scanner, MasterScanner, DispatchScanner
 
 import re
 
@@ -17,13 +28,16 @@ class Token:
 
     """
 
-    def __init__(self, ttype: Hashable, token: Any, text: str, line: int = 1, col: int = 1, file: Optional[str] = None):
+    def __init__(self, ttype: Hashable, token: Any, text: str, line: int = 1, col: int = 1, file: Optional[str] = None,
+                 start: int = -1, end: int = -1):
         """
 
         :param ttype:
         :param token:
         :param line:
         :param col:
+        :param start: offset of the token in the source
+        :param end: offset just past the token in the source
         """
 
         self.type = ttype
@@ -32,6 +46,8 @@ class Token:
         self.line = line
         self.col = col
         self.file = file
+        self.start = start
+        self.end = end
 
     def loc_str(self):
         if self.file:
@@ -74,6 +90,97 @@ class Token:
         return "{}({})".format(self.type, repr(self.token))
 
 
+class MappedToken(Token):
+    """
+    Token whose text stays in a memory-mapped source until it is read.
+
+    text and token are decoded on first access. raw gives the undecoded bytes as a memoryview. Once the map is
+    closed, they are read from the file instead.
+    """
+
+    TEXT = object()
+
+    def __init__(self, ttype: Hashable, buf: Union[mmap.mmap, bytes], start: int, end: int, line: int = 1,
+                 col: int = 1, file: Optional[str] = None, encoding: str = "utf-8", token: Any = TEXT):
+        """
+
+        :param ttype:
+        :param buf: memory-mapped source
+        :param start: offset of the token in buf
+        :param end: offset just past the token in buf
+        :param line:
+        :param col: column in bytes
+        :param file:
+        :param encoding: encoding of buf
+        :param token: value of the token, MappedToken.TEXT if it is the decoded text
+        """
+
+        self.type = ttype
+        self.buf = buf
+        self.start = start
+        self.end = end
+        self.line = line
+        self.col = col
+        self.file = file
+        self.encoding = encoding
+        self._text = None
+        self._token = token
+
+    @property
+    def raw(self) -> memoryview:
+        """
+
+        :return:
+        """
+
+        if isinstance(self.buf, mmap.mmap) and self.buf.closed:
+            return memoryview(self.read())
+        return memoryview(self.buf)[self.start:self.end]
+
+    def read(self) -> bytes:
+        """
+        Bytes of the token, from the map or, once it is closed, from the file.
+
+        :return:
+        """
+
+        if isinstance(self.buf, mmap.mmap) and self.buf.closed:
+            if self.end == self.start:
+                return b''
+            with open(self.file, "rb") as file:
+                file.seek(self.start)
+                return file.read(self.end - self.start)
+        return self.buf[self.start:self.end]
+
+    @property
+    def text(self) -> str:
+        """
+
+        :return:
+        """
+
+        if self._text is None:
+            self._text = self.read().decode(self.encoding)
+        return self._text
+
+    @text.setter
+    def text(self, text: str):
+        self._text = text
+
+    @property
+    def token(self) -> Any:
+        """
+
+        :return:
+        """
+
+        return self.text if self._token is MappedToken.TEXT else self._token
+
+    @token.setter
+    def token(self, token: Any):
+        self._token = token
+
+
 class Lexer:
     """
 
@@ -82,6 +189,18 @@ class Lexer:
     EOI = "EOI"
     UNK = "unknown"
 
+    ENGINES = {
+        "regex": Scanner,
+        "master": MasterScanner,
+        "dispatch": DispatchScanner,
+    }
+
+    # Bytes an encoding must give for the ASCII characters to lex with bytes patterns
+    ASCII = bytes(range(128))
+
+    # Lexer of the worker processes of tokenize_parallel()
+    _worker: Optional[Lexer] = None
+
     class Iter:
         """
 
@@ -97,10 +216,41 @@ class Lexer:
             self.lexer = lexer
             self.file = file
             self.str_in = str_in
-            self.line_idx = [i for i in range(len(str_in)) if i == 0 or str_in[i - 1] == '\n'] if len(self.str_in) else [-1]
+            self.line_idx = Lexer.Iter.line_table(str_in)
             self.n = 0
             self.stop = False
 
+        @staticmethod
+        def line_table(str_in: Union[str, bytes]) -> List[int]:
+            """
+            Offsets of the line starts in str_in, [-1] if str_in is empty.
+
+            :param str_in:
+            :return:
+            """
+
+            if not str_in:
+                return [-1]
+            nl = '\n' if isinstance(str_in, str) else b'\n'
+            line_idx = [0]
+            last = len(str_in) - 1
+            i = str_in.find(nl)
+            while 0 <= i < last:
+                line_idx.append(i + 1)
+                i = str_in.find(nl, i + 1)
+            return line_idx
+
+        def locate(self, pos: int) -> Tuple[int, int]:
+            """
+            Line and column, both starting at 1, of an offset in str_in.
+
+            :param pos:
+            :return:
+            """
+
+            line = bisect_right(self.line_idx, pos) - 1
+            return line + 1, pos - self.line_idx[line] + 1
+
         def __iter__(self) -> Lexer.Iter:
             """
 
@@ -125,36 +275,510 @@ class Lexer:
                     else:
                         self.stop = True
                         if self.str_in:
-                            t = Token(Lexer.EOI, None, '', len(self.line_idx), self.n - self.line_idx[-1], self.file)
+                            t = Token(Lexer.EOI, None, '', len(self.line_idx), self.n - self.line_idx[-1], self.file,
+                                      self.n, self.n)
                         else:
-                            t = Token(Lexer.EOI, None, '', -1, -1, self.file)
+                            t = Token(Lexer.EOI, None, '', -1, -1, self.file, 0, 0)
                         return t
-                ttype, token, text, length = self.lexer.get_token(self.str_in[self.n:])
+                ttype, token, text, length = self.lexer.get_token(self.str_in, self.n)
                 if token is not None:
-                    line = self.line_idx.index(max(i for i in self.line_idx if i <= self.n))
-                    col = self.n - self.line_idx[line]
-                    out = Token(ttype, token, text, line + 1, col + 1, self.file)
+                    line, col = self.locate(self.n)
+                    out = Token(ttype, token, text, line, col, self.file, self.n, self.n + length)
                 self.n += length
             return out
 
-    def __init__(self, tokens: Optional[Dict] = None, actions: Optional[Dict[Hashable, Callable[[str], Any]]] = None):
+    class MappedIter:
+        """
+        Token iterator over a memory-mapped file, matched with bytes patterns.
+
+        Tokens are MappedTokens, so their text is only decoded when it is read. Columns count bytes. The map stays
+        open after EOI, for the tokens to read their text from, and is unmapped once the iterator and its tokens are
+        all freed. close(), or leaving a with block, unmaps it at once; tokens read later are read from the file.
+        """
+
+        def __init__(self, lexer, path: PathLike, encoding: str = "utf-8"):
+            """
+
+            :param lexer:
+            :param path:
+            :param encoding: encoding of the file
+            """
+
+            self.lexer = lexer
+            self.file = path
+            self.encoding = encoding
+            self.scanner = lexer.bytes_scanner(encoding)
+            self.buf = b''
+            self.open()
+            self.n = 0
+            self.line = 1
+            self.line_start = 0
+            self.stop = False
+
+        def open(self):
+            """
+            Maps the file, if it isn't mapped.
+
+            :return:
+            """
+
+            if self.closed:
+                with open(self.file, "rb") as file:
+                    try:
+                        self.buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                    except ValueError:
+                        # Empty files can not be mapped
+                        self.buf = b''
+
+        @property
+        def closed(self) -> bool:
+            """
+
+            :return: True if the file isn't mapped
+            """
+
+            return not isinstance(self.buf, mmap.mmap) or self.buf.closed
+
+        def close(self):
+            """
+            Unmaps the file. A map whose raw bytes are still viewed through a memoryview is left to be unmapped when
+            it is freed.
+
+            :return:
+            """
+
+            if isinstance(self.buf, mmap.mmap):
+                try:
+                    self.buf.close()
+                except BufferError:
+                    pass
+
+        def __enter__(self) -> Lexer.MappedIter:
+            return self
+
+        def __exit__(self, *exc):
+            self.close()
+
+        def __iter__(self) -> Lexer.MappedIter:
+            """
+
+            :return:
+            """
+
+            self.open()
+            self.n = 0
+            self.line = 1
+            self.line_start = 0
+            self.stop = False
+            return self
+
+        def __next__(self) -> Token:
+            """
+
+            :return:
+            """
+
+            if self.stop:
+                raise StopIteration
+            buf = self.buf
+            actions = self.lexer.actions
+            while True:
+                n = self.n
+                if n >= len(buf):
+                    self.stop = True
+                    if n:
+                        return MappedToken(Lexer.EOI, buf, n, n, self.line, n - self.line_start, self.file,
+                                           self.encoding, None)
+                    return MappedToken(Lexer.EOI, buf, 0, 0, -1, -1, self.file, self.encoding, None)
+                ttype, end = self.scanner.match(buf, n)
+                if ttype is None:
+                    ttype, end = Lexer.UNK, n + self.char_len(buf[n])
+                line, col = self.line, n - self.line_start + 1
+                self.advance(n, end)
+                if ttype in actions:
+                    token = actions[ttype](buf[n:end].decode(self.encoding))
+                    if token is None:
+                        continue
+                    return MappedToken(ttype, buf, n, end, line, col, self.file, self.encoding, token)
+                return MappedToken(ttype, buf, n, end, line, col, self.file, self.encoding)
+
+        def char_len(self, lead: int) -> int:
+            """
+            Length in bytes of the character starting with lead, so unknown tokens do not split characters.
+
+            :param lead:
+            :return:
+            """
+
+            if self.encoding.replace('-', '').replace('_', '').lower() != "utf8" or lead < 0xC0:
+                return 1
+            return min(2 if lead < 0xE0 else 3 if lead < 0xF0 else 4, len(self.buf) - self.n)
+
+        def advance(self, start: int, end: int):
+            """
+            Moves past buf[start:end], counting the lines it starts.
+
+            :param start:
+            :param end:
+            """
+
+            buf = self.buf
+            i = buf.find(b'\n', start, end)
+            while i != -1 and i + 1 < len(buf):
+                self.line += 1
+                self.line_start = i + 1
+                i = buf.find(b'\n', i + 1, end)
+            self.n = end
+
+    class StreamIter:
+        """
+        Token iterator over a file object or an iterator of chunks.
+
+        Only a bounded buffer is kept. It is refilled whenever fewer than lookahead characters are left or a match
+        reaches the end of the buffer, so each token is matched with at least lookahead characters ahead of it. Tokens
+        are the same as for the whole input as long as no pattern needs to look further than lookahead characters:
+        a string literal longer than lookahead can be split into shorter tokens when its closing quote is not yet in
+        the buffer. A token longer than lookahead shows that this bound was hit, and raises a LexerError unless the
+        end of input was reached before the first token was matched. Without a source, chunks are pushed with feed()
+        and close(), and scan() returns None when it needs more input.
+        """
+
+        def __init__(self, lexer, source: Optional[Union[IO, Iterable[Union[str, bytes]]]] = None,
+                     file: Optional[str] = None, lookahead: int = 4096, chunk_size: int = 65536,
+                     encoding: str = "utf-8"):
+            """
+
+            :param lexer:
+            :param source: text or binary file object, or iterable of str or bytes chunks
+            :param file:
+            :param lookahead: characters kept ahead of the current token before matching, at least the length of the
+                longest token
+            :param chunk_size: characters or bytes read from a file object at a time
+            :param encoding: encoding of bytes chunks
+            """
+
+            self.lexer = lexer
+            self.file = file
+            self.lookahead = lookahead
+            self.chunk_size = chunk_size
+            self.encoding = encoding
+            self.decoder = None
+            if source is None or hasattr(source, "read"):
+                self.source = source
+            else:
+                self.source = iter(source)
+            self.buf = ''
+            self.base = 0
+            self.pos = 0
+            self.eof = False
+            self.line = 1
+            self.line_start = 0
+            self.prev_start = 0
+            self.stop = False
+            # A token was matched before the end of input was in the buffer
+            self.bounded = False
+
+        def __iter__(self) -> Lexer.StreamIter:
+            """
+
+            :return:
+            """
+
+            return self
+
+        def __next__(self) -> Token:
+            """
+
+            :return:
+            """
+
+            token = self.scan()
+            while token is None:
+                self.fill()
+                token = self.scan()
+            return token
+
+        def fill(self):
+            """
+            Reads the next chunk from source, closing the stream when source is exhausted.
+
+            :return:
+            """
+
+            if self.source is None:
+                raise ValueError("StreamIter without a source needs more input, use feed()")
+            if hasattr(self.source, "read"):
+                chunk = self.source.read(self.chunk_size)
+                # An empty read is the end of the file
+                chunk = chunk or None
+            else:
+                chunk = next(self.source, None)
+            if chunk is None:
+                self.close()
+            else:
+                self.feed(chunk)
+
+        def feed(self, chunk: Union[str, bytes]):
+            """
+            Appends a chunk of input. The part of the buffer already lexed is only dropped once it is longer than
+            lookahead, until then the chunk is appended in place.
+
+            :param chunk:
+            :return:
+            """
+
+            if isinstance(chunk, (bytes, bytearray, memoryview)):
+                if self.decoder is None:
+                    self.decoder = codecs.getincrementaldecoder(self.encoding)()
+                chunk = self.decoder.decode(chunk)
+            if self.pos > self.lookahead:
+                self.base += self.pos
+                self.buf = self.buf[self.pos:] + chunk
+                self.pos = 0
+            else:
+                # CPython resizes a str in place when += is applied to its only reference
+                buf, self.buf = self.buf, ''
+                buf += chunk
+                self.buf = buf
+
+        def close(self):
+            """
+            Marks the end of input.
+
+            :return:
+            """
+
+            if self.decoder is not None:
+                self.feed(self.decoder.decode(b'', True))
+            self.eof = True
+
+        def scan(self) -> Optional[Token]:
+            """
+
+            :raise StopIteration:
+                After the EOI token
+            :raise LexerError:
+                When a token longer than lookahead is matched and the tokens before it may differ from tokenize()
+
+            :return: the next token, or None when more input is needed
+            """
+
+            actions = self.lexer.actions
+            while True:
+                buf, pos = self.buf, self.pos
+                if not self.eof and (pos >= len(buf) or len(buf) - pos < self.lookahead):
+                    return None
+                if pos >= len(buf):
+                    return self.eoi()
+                ttype, end = self.lexer._scanner.match(buf, pos)
+                if ttype is None:
+                    ttype, end = Lexer.UNK, pos + 1
+                elif end == len(buf) and not self.eof:
+                    # The match might continue in the next chunk
+                    return None
+                if not self.eof:
+                    self.bounded = True
+                if self.bounded and end - pos > self.lookahead:
+                    raise error.LexerError("{}:{}:{}: token {} of {} characters is longer than lookahead {}".format(
+                        self.file, self.line, self.base + pos - self.line_start + 1, ttype, end - pos,
+                        self.lookahead))
+                line, col = self.line, self.base + pos - self.line_start + 1
+                text = buf[pos:end]
+                self.advance(end)
+                token = actions[ttype](text) if ttype in actions else text
+                if token is not None:
+                    return Token(ttype, token, text, line, col, self.file, self.base + pos, self.base + end)
+
+        def eoi(self) -> Token:
+            """
+
+            :return:
+            """
+
+            if self.stop:
+                raise StopIteration
+            self.stop = True
+            n = self.base + self.pos
+            if not n:
+                return Token(Lexer.EOI, None, '', -1, -1, self.file, 0, 0)
+            if self.line_start == n:
+                # A final newline does not start a line
+                return Token(Lexer.EOI, None, '', self.line - 1, n - self.prev_start, self.file, n, n)
+            return Token(Lexer.EOI, None, '', self.line, n - self.line_start, self.file, n, n)
+
+        def advance(self, end: int):
+            """
+            Moves past buf[pos:end], counting the lines it starts.
+
+            :param end:
+            :return:
+            """
+
+            buf = self.buf
+            i = buf.find('\n', self.pos, end)
+            while i != -1:
+                self.line += 1
+                self.prev_start, self.line_start = self.line_start, self.base + i + 1
+                i = buf.find('\n', i + 1, end)
+            self.pos = end
+
+    class AsyncIter:
+        """
+        Asynchronous token iterator over an asyncio.StreamReader, or any object with a coroutine read(n).
+
+        Tokens are lexed by a StreamIter without a source, and the reader is only awaited when it needs more input.
+        The same lookahead bound holds: tokens longer than lookahead raise a LexerError.
+        """
+
+        def __init__(self, lexer, reader: Any, file: Optional[str] = None, lookahead: int = 4096,
+                     chunk_size: int = 65536, encoding: str = "utf-8"):
+            """
+
+            :param lexer:
+            :param reader: object with a coroutine read(n) giving str or bytes, empty at the end of input
+            :param file:
+            :param lookahead: characters kept ahead of the current token before matching, at least the length of the
+                longest token
+            :param chunk_size: characters or bytes read at a time
+            :param encoding: encoding of bytes input
+            """
+
+            self.reader = reader
+            self.chunk_size = chunk_size
+            self.stream = Lexer.StreamIter(lexer, None, file, lookahead, chunk_size, encoding)
+
+        def __aiter__(self) -> Lexer.AsyncIter:
+            """
+
+            :return:
+            """
+
+            return self
+
+        async def __anext__(self) -> Token:
+            """
+
+            :return:
+            """
+
+            stream = self.stream
+            try:
+                token = stream.scan()
+                while token is None:
+                    chunk = await self.reader.read(self.chunk_size)
+                    if chunk:
+                        stream.feed(chunk)
+                    else:
+                        stream.close()
+                    token = stream.scan()
+            except StopIteration:
+                raise StopAsyncIteration
+            return token
+
+    def __init__(self, tokens: Optional[Dict] = None,
+                 actions: Optional[Union[Dict[Hashable, Callable[[str], Any]], str]] = None, engine: str = "master"):
         """
 
         :param tokens:
-        :param actions:
+        :param actions: actions, or the importable name of them, see Lexer.resolve()
+        :param engine: scanning engine, "master" (one combined regex, then only the later patterns that can match a
+            longer text), "regex" (one match per token pattern) or
+            "dispatch" (only the patterns that can start with the character at hand)
         """
 
         if actions is None:
             actions = {}
         if tokens is None:
             tokens = {}
-        self._tokens = tokens
+        if engine not in Lexer.ENGINES:
+            raise ValueError("engine must be one of {}, found {}".format(', '.join(Lexer.ENGINES), repr(engine)))
+        self._tokens = {}
         for token, regex in tokens.items():
             try:
                 self._tokens[token] = re.compile(regex)
             except re.error as err:
-                raise Lexer.Error(err.msg, token, err.pattern, err.pos)
+                raise error.RegexError(err.msg, token, err.pattern, err.pos)
         self.actions = actions
+        self.engine = engine
+        self._scanner = Lexer.ENGINES[engine](self._tokens)
+        self._bytes_scanners = {}
+        self._observer = None
+
+    @property
+    def actions(self) -> Dict[Hashable, Callable[[str], Any]]:
+        return self._actions
+
+    @actions.setter
+    def actions(self, actions: Union[Dict[Hashable, Callable[[str], Any]], str]):
+        if isinstance(actions, str):
+            self._actions_name = actions
+            self._actions = Lexer.resolve(actions)
+        else:
+            self._actions_name = None
+            self._actions = actions
+
+    @property
+    def observer(self) -> Optional[Observer]:
+        return self._observer
+
+    @observer.setter
+    def observer(self, observer: Optional[Observer]):
+        if isinstance(self._scanner, Observer.Scanner):
+            self._scanner = self._scanner.scanner
+        self._observer = observer
+        if observer is not None:
+            self._scanner = Observer.Scanner(self._scanner, observer)
+
+    @staticmethod
+    def resolve(name: str) -> Any:
+        """
+        Imports an object by name, as "module:attribute" or "module.attribute".
+
+        :raise ValueError:
+            When name can't be imported
+
+        :param name:
+        :return:
+        """
+
+        module, _, attr = name.partition(':')
+        if not attr:
+            module, _, attr = name.rpartition('.')
+        try:
+            obj = importlib.import_module(module)
+            for part in attr.split('.'):
+                obj = getattr(obj, part)
+        except (ImportError, AttributeError, ValueError) as err:
+            raise ValueError("can't import {}: {}".format(name, err))
+        return obj
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Pickled state, without the bytes scanners, which are rebuilt when needed, or the observer. Compiled patterns
+        are pickled as their source and compiled again when loaded, and actions given by name are imported again.
+
+        :return:
+        """
+
+        state = self.__dict__.copy()
+        state['_bytes_scanners'] = {}
+        if self._observer is not None:
+            state['_scanner'] = self._scanner.scanner
+            state['_observer'] = None
+        if self._actions_name is not None:
+            state['_actions'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        """
+
+        :param state:
+        :return:
+        """
+
+        self.__dict__.update(state)
+        if self._actions_name is not None:
+            self._actions = Lexer.resolve(self._actions_name)
 
     @property
     def tokens(self) -> Iterator[str]:
@@ -173,23 +797,21 @@ class Lexer:
 
         return len(self.tokens)
 
-    def get_token(self, string: str) -> Tuple:
+    def get_token(self, string: str, pos: int = 0) -> Tuple:
         """
 
         :param string:
+        :param pos: offset in string where the token starts
         :return:
         """
 
-        greedy = (Lexer.UNK, string[0])
-        for token, regex in self._tokens.items():
-            match = regex.match(string)
-            if match is not None:
-                if greedy[0] == Lexer.UNK or len(greedy[1]) < len(match[0]):
-                    greedy = (token, match[0])
-        try:
-            return greedy[0], self.actions[greedy[0]](greedy[1]), greedy[1], len(greedy[1])
-        except KeyError:
-            return greedy[0], greedy[1], greedy[1], len(greedy[1])
+        ttype, end = self._scanner.match(string, pos)
+        if ttype is None:
+            ttype, end = Lexer.UNK, pos + 1
+        text = string[pos:end]
+        if ttype in self._actions:
+            return ttype, self._actions[ttype](text), text, end - pos
+        return ttype, text, text, end - pos
 
     def tokenize(self, str_in: str, file: PathLike = "") -> Lexer.Iter:
         """
@@ -204,18 +826,408 @@ class Lexer:
 
         return Lexer.Iter(self, str_in, file)
 
-    def tokenize_file(self, path: PathLike) -> Lexer.Iter:
+    def bytes_scanner(self, encoding: str = "utf-8") -> Scanner:
+        """
+        Scanner over bytes for the token patterns encoded with encoding. Classes such as \\w and \\d only match
+        ASCII in bytes patterns.
+
+        :raise ValueError:
+            When encoding is unknown or doesn't encode ASCII characters as themselves, as UTF-16 doesn't
+        :raise RegexError:
+            When a token pattern can not be encoded or compiled as a bytes pattern
+
+        :param encoding:
+        :return:
+        """
+
+        if encoding not in self._bytes_scanners:
+            try:
+                ascii_compatible = codecs.lookup(encoding).encode(Lexer.ASCII.decode("ascii"))[0] == Lexer.ASCII
+            except (LookupError, UnicodeError):
+                ascii_compatible = False
+            if not ascii_compatible:
+                raise ValueError("bytes patterns need an ASCII compatible encoding, found {}".format(repr(encoding)))
+            tokens = {}
+            for token, regex in self._tokens.items():
+                try:
+                    tokens[token] = re.compile(regex.pattern.encode(encoding), regex.flags & ~re.UNICODE)
+                except UnicodeError as err:
+                    raise error.RegexError(str(err), token, regex.pattern, err.start)
+                except re.error as err:
+                    raise error.RegexError(err.msg, token, err.pattern, err.pos)
+            self._bytes_scanners[encoding] = Lexer.ENGINES[self.engine](tokens)
+        if self._observer is not None:
+            return Observer.Scanner(self._bytes_scanners[encoding], self._observer)
+        return self._bytes_scanners[encoding]
+
+    def tokenize_array(self, str_in: str, file: PathLike = "") -> TokenArray:
+        """
+        Lexes str_in into a TokenArray instead of Token objects.
+
+        :param str_in:
+        :param file:
+        :return:
+        """
+
+        if not file:
+            file = repr(str_in.__class__)
+
+        tokens = TokenArray(str_in, str(file))
+        n = 0
+        while n < len(str_in):
+            n = self._lex_into(tokens, n)
+        return tokens
+
+    def tokenize_parallel(self, str_in: str, file: PathLike = "", delimiter: str = "\n",
+                          workers: Optional[int] = None, chunk_size: int = 1 << 20,
+                          overlap: int = 4096) -> TokenArray:
+        """
+        Lexes str_in into a TokenArray in a pool of processes.
+
+        str_in is split after occurrences of delimiter about every chunk_size characters, and each worker lexes
+        from a split until it passes the next one. This pays off for token sets where a token never continues past
+        delimiter, as each chunk then starts at a token. Where a token does span a split, the chunks are joined
+        where their tokens line up again, lexing sequentially in between. Each worker is only sent its chunk with
+        overlap characters on both sides, so the patterns are first checked to read no further than that (see
+        Scanner.reach()): each must either be unable to match a character of delimiter, or only read a bounded
+        number of characters past its start or, for a trailing repeat such as [a-z]+, past its match. A worker
+        leaves a token whose match gets that close to the end of its slice to the sequential lexing. When a pattern
+        such as '[^']*' may read arbitrarily far without matching, the text is lexed sequentially instead, so the
+        tokens are always those of tokenize_array(). The lexer is pickled to the workers, so its actions should be
+        given by importable name.
+
+        :raise ValueError:
+            When delimiter is empty, or the lexer can't be pickled
+
+        :param str_in:
+        :param file:
+        :param delimiter: text after which the input may be split
+        :param workers: number of processes, all CPUs if None, this process if 1
+        :param chunk_size: approximate number of characters lexed by a worker at a time
+        :param overlap: characters sent to a worker before and after its chunk, as context for the patterns, at
+            least how far they read
+        :return:
+        """
+
+        if not delimiter:
+            raise ValueError("delimiter must not be empty")
+        if not file:
+            file = repr(str_in.__class__)
+
+        splits = [0]
+        while True:
+            split = str_in.find(delimiter, splits[-1] + chunk_size)
+            if split < 0 or split + len(delimiter) >= len(str_in):
+                break
+            splits.append(split + len(delimiter))
+        splits.append(len(str_in))
+        margins = [Scanner.reach(regex, delimiter) for regex in self._tokens.values()]
+        if workers == 1 or len(splits) < 3 or None in margins or max(margins, default=0) > overlap:
+            return self.tokenize_array(str_in, file)
+        try:
+            state = pickle.dumps(self)
+        except (pickle.PicklingError, AttributeError, TypeError) as err:
+            raise ValueError("lexer can't be sent to worker processes, give its actions by name: {}".format(err))
+        code = 'I' if len(str_in) < 1 << 32 else 'Q'
+        slices = [(max(0, start - overlap), min(len(str_in), stop + overlap))
+                  for start, stop in zip(splits, splits[1:])]
+        with ProcessPoolExecutor(workers, initializer=Lexer._parallel_init, initargs=(state,)) as pool:
+            chunks = list(pool.map(Lexer._lex_chunk, (str_in[lo:hi] for lo, hi in slices), (lo for lo, _ in slices),
+                                   splits[:-1], splits[1:], (hi == len(str_in) for _, hi in slices),
+                                   repeat(max(margins, default=0)), repeat(code)))
+
+        tokens = TokenArray(str_in, str(file))
+        # Tokens are final up to pos, which always is the start of a token
+        pos = 0
+        idx = 0
+        while idx < len(chunks):
+            types, ids, starts, ends, values, every = chunks[idx]
+            if pos >= every[-1]:
+                # Passed by the tokens of the previous chunk
+                idx += 1
+                continue
+            k = bisect_left(every, pos)
+            if every[k] != pos:
+                pos = self._lex_into(tokens, pos)
+                continue
+            tokens.extend(types, ids, starts, ends, values, pos)
+            pos = every[-1]
+            idx += 1
+        return tokens
+
+    @staticmethod
+    def _parallel_init(state: bytes):
+        """
+        Loads the lexer of a tokenize_parallel() worker.
+
+        :param state: pickled lexer
+        :return:
+        """
+
+        Lexer._worker = pickle.loads(state)
+
+    @staticmethod
+    def _lex_chunk(text: str, offset: int, start: int, stop: int, final: bool, margin: int,
+                   code: str) -> Tuple[List[Hashable], array, array, array, Dict[int, Any], array]:
+        """
+        Lexes text, the slice of the source at offset, from start until a token ends at or after stop, as
+        tokenize_array() would. Offsets are those in the source.
+
+        :param text:
+        :param offset:
+        :param start:
+        :param stop:
+        :param final: whether text goes to the end of the source
+        :param margin: characters the patterns may read past the end of a match
+        :param code: typecode of the offset arrays
+        :return: (types, ids, starts, ends, values, every) where every holds the starts of all tokens, skipped ones
+            included, followed by the end of the last one, or by the start of a token ending within margin of the
+            end of text
+        """
+
+        lexer = Lexer._worker
+        tokens = TokenArray('')
+        tokens.starts, tokens.ends = array(code), array(code)
+        every = array(code)
+        n = start - offset
+        stop -= offset
+        while n < stop:
+            every.append(offset + n)
+            end = lexer._lex_into(tokens, n, text, offset)
+            if end > len(text) - margin and not final:
+                # The token may depend on what follows text, it is left to the sequential lexing
+                if tokens.starts and tokens.starts[-1] == offset + n:
+                    del tokens.ids[-1], tokens.starts[-1], tokens.ends[-1]
+                    tokens.values.pop(len(tokens.ids), None)
+                break
+            n = end
+        else:
+            every.append(offset + n)
+        return tokens.types, tokens.ids, tokens.starts, tokens.ends, tokens.values, every
+
+    def _lex_into(self, tokens: TokenArray, n: int, source: Optional[str] = None, offset: int = 0) -> int:
+        """
+        Lexes the token of source at n into tokens.
+
+        :param tokens:
+        :param n:
+        :param source: text to lex, tokens.source if None
+        :param offset: offset of source in tokens.source
+        :return: the end of the token in source
+        """
+
+        if source is None:
+            source = tokens.source
+        ttype, end = self._scanner.match(source, n)
+        if ttype is None:
+            ttype, end = Lexer.UNK, n + 1
+        if ttype in self.actions:
+            token = self.actions[ttype](source[n:end])
+            if token is not None:
+                tokens.append(ttype, offset + n, offset + end, token)
+        else:
+            tokens.append(ttype, offset + n, offset + end)
+        return end
+
+    def tokenize_stream(self, stream: Optional[Union[IO, Iterable[Union[str, bytes]]]], file: PathLike = "",
+                        lookahead: int = 4096, encoding: str = "utf-8") -> Lexer.StreamIter:
+        """
+
+        :param stream: text or binary file object, or iterable of str or bytes chunks
+        :param file:
+        :param lookahead: characters kept ahead of the current token before matching, at least the length of the longest
+            token: tokens are only guaranteed to match as with tokenize() when no pattern needs to see further, and
+            a longer token raises a LexerError
+        :param encoding: encoding of bytes input
+        :return:
+        """
+
+        if not file:
+            file = getattr(stream, "name", repr(stream.__class__))
+        return Lexer.StreamIter(self, stream, str(file), lookahead, encoding=encoding)
+
+    def tokenize_async(self, reader: Any, file: PathLike = "", lookahead: int = 4096,
+                       encoding: str = "utf-8") -> Lexer.AsyncIter:
+        """
+        Lexes an asyncio.StreamReader with "async for", without blocking the event loop.
+
+        :param reader: object with a coroutine read(n) giving str or bytes, empty at the end of input
+        :param file:
+        :param lookahead: characters kept ahead of the current token before matching, at least the length of the longest
+            token: tokens are only guaranteed to match as with tokenize() when no pattern needs to see further, and
+            a longer token raises a LexerError
+        :param encoding: encoding of bytes input
+        :return:
+        """
+
+        if not file:
+            file = repr(reader.__class__)
+        return Lexer.AsyncIter(self, reader, str(file), lookahead, encoding=encoding)
+
+    def tokenize_file(self, path: PathLike, memory_map: bool = False,
+                      encoding: Optional[str] = None) -> Union[Lexer.Iter, Lexer.MappedIter]:
         """
 
         :param path:
+        :param memory_map: memory-map the file and lex it as bytes instead of reading it into a str, the map being
+            closed by the iterator's close() or once it and its tokens are freed
+        :param encoding: encoding of the file, UTF-8 by default when memory-mapped, which needs an ASCII compatible one
         :return:
         """
 
-        with open(path, "r") as file:
+        if memory_map:
+            return Lexer.MappedIter(self, path, encoding or "utf-8")
+        with open(path, "r", encoding=encoding) as file:
             string = file.read()
         return Lexer.Iter(self, string, path)
 
 
+class TokenArray:
+    """
+    Columnar buffer of the tokens of a source.
+
+    Token types are interned to small ids, and ids and offsets are kept in arrays. Text is sliced from the source
+    and only values produced by lexer actions are stored. Tokens are made when indexed, the last one being EOI.
+    """
+
+    TEXT = object()
+
+    def __init__(self, source: str, file: Optional[str] = None):
+        """
+
+        :param source:
+        :param file:
+        """
+
+        self.source = source
+        self.file = file
+        self.types: List[Hashable] = []
+        self.type_ids: Dict[Hashable, int] = {}
+        self.ids = array('H')
+        self.starts = array('I' if len(source) < 1 << 32 else 'Q')
+        self.ends = array(self.starts.typecode)
+        self.values: Dict[int, Any] = {}
+        self.line_idx = Lexer.Iter.line_table(source)
+
+    def append(self, ttype: Hashable, start: int, end: int, token: Any = TEXT):
+        """
+
+        :param ttype:
+        :param start:
+        :param end:
+        :param token: value of the token, TokenArray.TEXT if it is the text
+        :return:
+        """
+
+        try:
+            tid = self.type_ids[ttype]
+        except KeyError:
+            tid = self.type_ids[ttype] = len(self.types)
+            self.types.append(ttype)
+        if token is not TokenArray.TEXT:
+            self.values[len(self.ids)] = token
+        self.ids.append(tid)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def extend(self, types: List[Hashable], ids: array, starts: array, ends: array, values: Dict[int, Any],
+               lo: int = 0):
+        """
+        Appends the tokens of another buffer of the same source that start at or after lo.
+
+        :param types: token types by id of the other buffer
+        :param ids:
+        :param starts:
+        :param ends:
+        :param values: values by index of the other buffer
+        :param lo:
+        :return:
+        """
+
+        first = bisect_left(starts, lo)
+        remap = []
+        for ttype in types:
+            if ttype not in self.type_ids:
+                self.type_ids[ttype] = len(self.types)
+                self.types.append(ttype)
+            remap.append(self.type_ids[ttype])
+        shift = len(self.ids) - first
+        self.values.update((idx + shift, value) for idx, value in values.items() if idx >= first)
+        self.ids.extend(map(remap.__getitem__, ids[first:]))
+        self.starts.extend(starts[first:])
+        self.ends.extend(ends[first:])
+
+    def __len__(self) -> int:
+        """
+
+        :return:
+        """
+
+        return len(self.ids) + 1
+
+    def type(self, idx: int) -> Hashable:
+        """
+
+        :param idx:
+        :return:
+        """
+
+        return Lexer.EOI if idx == len(self.ids) else self.types[self.ids[idx]]
+
+    def text(self, idx: int) -> str:
+        """
+
+        :param idx:
+        :return:
+        """
+
+        return '' if idx == len(self.ids) else self.source[self.starts[idx]:self.ends[idx]]
+
+    def __getitem__(self, idx: int) -> Token:
+        """
+
+        :param idx:
+        :return:
+        """
+
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("TokenArray index out of range")
+        line, col = self.locate(idx)
+        if idx == len(self.ids):
+            n = len(self.source)
+            return Token(Lexer.EOI, None, '', line, col, self.file, n, n)
+        start, end = self.starts[idx], self.ends[idx]
+        text = self.source[start:end]
+        return Token(self.types[self.ids[idx]], self.values.get(idx, text), text, line, col, self.file, start, end)
+
+    def locate(self, idx: int) -> Tuple[int, int]:
+        """
+        Line and column of the token at idx, as Lexer.Iter gives them.
+
+        :param idx:
+        :return:
+        """
+
+        if idx == len(self.ids):
+            n = len(self.source)
+            if not n:
+                return -1, -1
+            return len(self.line_idx), n - self.line_idx[-1]
+        start = self.starts[idx]
+        line = bisect_right(self.line_idx, start) - 1
+        return line + 1, start - self.line_idx[line] + 1
+
+    def __iter__(self) -> Iterator[Token]:
+        """
+
+        :return:
+        """
+
+        return map(self.__getitem__, range(len(self)))
+
+
 def test():
     from parsepy.lexer import Lexer
     from parsepy.lexer.error import LexerError
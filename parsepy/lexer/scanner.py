@@ -0,0 +1,537 @@
+"""
+@author: BinaryAura <jadunker@hotmail.com>
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Pattern, Tuple, Union
+
+import re
+
+try:
+    from re import _parser as sre_parse, _compiler as sre_compile, _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_compile
+    import sre_constants
+
+
+class Scanner:
+    """
+    Finds the longest token match at a position by trying every token pattern in turn.
+
+    Ties go to the token defined first. When nothing matches, the token type is None.
+    """
+
+    def __init__(self, tokens: Dict[Hashable, Pattern]):
+        """
+
+        :param tokens: compiled patterns keyed by token type, in definition order
+        """
+
+        self.tokens = tokens
+
+    def match(self, string: Union[str, bytes], pos: int = 0) -> Tuple[Optional[Hashable], int]:
+        """
+
+        :param string: text to scan
+        :param pos: position of the token start in string
+        :return: (token type or None, end of the match)
+        """
+
+        greedy, end = None, pos
+        for token, regex in self.tokens.items():
+            match = regex.match(string, pos)
+            if match is not None:
+                if greedy is None or end < match.end():
+                    greedy, end = token, match.end()
+        return greedy, end
+
+    def tried(self, string: Union[str, bytes], pos: int = 0) -> int:
+        """
+
+        :param string: text to scan
+        :param pos: position of the token start in string
+        :return: number of regex match calls match() makes at pos
+        """
+
+        return len(self.tokens)
+
+    @classmethod
+    def reach(cls, regex: Pattern, stops: str = '') -> Optional[int]:
+        """
+        How far a match attempt of a token pattern can read past where it starts or, for a pattern ending with an
+        unbounded repeat, past where its match ends.
+
+        :param regex: compiled token pattern
+        :param stops: characters that, if the pattern can't match any of them, it can read up to but not past
+        :return: the number of characters, 0 if the pattern can't match one of stops, None if there is no bound
+        """
+
+        parsed = DispatchScanner.parse(regex)
+        if parsed is None:
+            return None
+        if stops and not cls.consumes(parsed, regex.flags, stops):
+            return 0
+        return cls.reach_of(parsed, True)
+
+    @classmethod
+    def reach_of(cls, items: Any, tail: bool) -> Optional[int]:
+        """
+        How far an attempt of parsed items can read, as in reach().
+
+        :param items: parsed pattern or subpattern
+        :param tail: whether the items end the pattern
+        :return: the number of characters, None if there is no bound
+        """
+
+        c = sre_constants
+        width = 0
+        for n, (op, av) in enumerate(items):
+            last = tail and n == len(items) - 1
+            if op in (c.LITERAL, c.NOT_LITERAL, c.IN, c.ANY, c.AT):
+                # \b and $ read the character after
+                width += 1
+                continue
+            if op is c.SUBPATTERN:
+                sub = cls.reach_of(av[3], last)
+            elif op is getattr(c, 'ATOMIC_GROUP', None):
+                sub = cls.reach_of(av, last)
+            elif op is c.BRANCH:
+                subs = [cls.reach_of(branch, last) for branch in av[1]]
+                sub = None if None in subs else max(subs)
+            elif op is c.ASSERT or op is c.ASSERT_NOT:
+                # Lookbehinds read before the position
+                sub = cls.reach_of(av[1], False) if av[0] > 0 else 0
+            elif op in (c.MAX_REPEAT, c.MIN_REPEAT, getattr(c, 'POSSESSIVE_REPEAT', c.MAX_REPEAT)):
+                sub = cls.reach_of(av[2], False)
+                if sub is not None and av[1] == c.MAXREPEAT:
+                    if not last:
+                        return None
+                    # The repeat stops reading one body past the end of the match
+                    return width + sub
+                if sub is not None:
+                    sub *= av[1]
+            else:
+                return None
+            if sub is None:
+                return None
+            width += sub
+        return width
+
+    @classmethod
+    def consumes(cls, items: Any, flags: int, chars: str) -> bool:
+        """
+
+        :param items: parsed pattern or subpattern
+        :param flags: flags of the pattern
+        :param chars:
+        :return: whether the items, lookarounds included, can match one of chars, True if unknown
+        """
+
+        c = sre_constants
+        for op, av in items:
+            if op in (c.LITERAL, c.NOT_LITERAL, c.IN, c.ANY):
+                try:
+                    state = sre_parse.State() if hasattr(sre_parse, 'State') else sre_parse.Pattern()
+                    state.flags = flags
+                    char = sre_compile.compile(sre_parse.SubPattern(state, [(op, av)]), flags)
+                except Exception:
+                    return True
+                if any(char.match(ch) for ch in chars):
+                    return True
+            elif op is c.AT:
+                continue
+            elif op is c.SUBPATTERN:
+                if cls.consumes(av[3], (flags | av[1]) & ~av[2], chars):
+                    return True
+            elif op is getattr(c, 'ATOMIC_GROUP', None):
+                if cls.consumes(av, flags, chars):
+                    return True
+            elif op is c.BRANCH:
+                if any(cls.consumes(branch, flags, chars) for branch in av[1]):
+                    return True
+            elif op is c.ASSERT or op is c.ASSERT_NOT:
+                if cls.consumes(av[1], flags, chars):
+                    return True
+            elif op in (c.MAX_REPEAT, c.MIN_REPEAT, getattr(c, 'POSSESSIVE_REPEAT', c.MAX_REPEAT)):
+                if cls.consumes(av[2], flags, chars):
+                    return True
+            else:
+                return True
+        return False
+
+
+class MasterScanner(Scanner):
+    """
+    Finds the longest token match at a position with a single combined regex.
+
+    The token patterns are the alternatives, in definition order, of one master pattern, each ended by an empty
+    group telling which one matched. One match call so gives the first token defined that matches at the position,
+    which is the result unless a token defined later matches a longer text. Only the later tokens that can match
+    there are tried for that: those whose literal prefix starts the text, found by walking a trie, and those whose
+    first character, as worked out by DispatchScanner, is the one at hand. A token no later one can start like is
+    taken as matched. Patterns that can not be embedded (numbered backreferences, named groups, global inline flags)
+    are tried one by one after the master pattern.
+    """
+
+    FLAGS = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's', re.VERBOSE: 'x'}
+
+    def __init__(self, tokens: Dict[Hashable, Pattern]):
+        """
+
+        :param tokens: compiled patterns keyed by token type, in definition order
+        """
+
+        super().__init__(tokens)
+        self.types: List[Hashable] = list(tokens.keys())
+        # Token of each group ending an alternative of the master pattern
+        self.owner: Dict[int, int] = {}
+        self.rest: List[Tuple[int, Pattern]] = []
+        self.trie: Dict[Any, Any] = {}
+        self.anywhere: List[Tuple[int, Pattern]] = []
+        starts: Dict[Union[str, int], List[int]] = {}
+        parts = []
+        group = 0
+        for n, regex in enumerate(tokens.values()):
+            part = self.embed(regex)
+            if part is None or regex.groupindex:
+                self.rest += [(n, regex)]
+                continue
+            try:
+                re.compile(part)
+            except re.error:
+                self.rest += [(n, regex)]
+                continue
+            parts += [part]
+            group += regex.groups + 1
+            self.owner[group] = n
+            prefix = self.prefix(regex)
+            if prefix:
+                node = self.trie
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, []).append((n, regex))
+                continue
+            first = DispatchScanner.first(regex)
+            if first is None:
+                self.anywhere += [(n, regex)]
+                continue
+            for char in first:
+                starts.setdefault(char, []).append(n)
+        regexes = list(tokens.values())
+        self.index: Dict[Union[str, int], List[Tuple[int, Pattern]]] = {}
+        for char, ns in starts.items():
+            ns = sorted(set(ns) | {n for n, _ in self.anywhere})
+            self.index[char] = [(n, regexes[n]) for n in ns]
+        # Patterns of index or anywhere defined after a token, by token and character
+        self.later_cache: Dict[Tuple[int, Any], List[Tuple[int, Pattern]]] = {}
+        # Token type of each group whose master match is the result, as no later token starts with its characters
+        self.final: Dict[int, Hashable] = {}
+        if not self.rest:
+            firsts = {n: DispatchScanner.first(regexes[n]) for n in self.owner.values()}
+            for group, n in self.owner.items():
+                if firsts[n] is not None and all(first is not None and not first & firsts[n]
+                                                 for m, first in firsts.items() if m > n):
+                    self.final[group] = self.types[n]
+        self.master = re.compile((b'|' if isinstance(parts[0], bytes) else '|').join(parts)) if parts else None
+
+    @classmethod
+    def embed(cls, regex: Pattern) -> Optional[Union[str, bytes]]:
+        """
+        Wraps a token pattern as an alternative of the master pattern.
+
+        :param regex: compiled token pattern
+        :return: the wrapped pattern source, or None if it must be matched on its own
+        """
+
+        pattern = regex.pattern
+        text = pattern.decode('latin-1') if isinstance(pattern, bytes) else pattern
+        if re.search(r'\\[1-9]|\\g<\d|\(\?\(\d', text):
+            return None
+        flags = regex.flags & ~(re.UNICODE if isinstance(pattern, str) else 0)
+        letters = ''
+        for flag, letter in cls.FLAGS.items():
+            if flags & flag:
+                letters += letter
+                flags &= ~flag
+        if flags:
+            return None
+        # The empty group closes last, so it is the lastindex of a match. Put at the end, it leaves the first
+        # character of the pattern at the start of the alternative, where the regex engine checks it to skip it
+        text = "(?{}:{})()".format(letters, text)
+        return text.encode('latin-1') if isinstance(pattern, bytes) else text
+
+    @staticmethod
+    def prefix(regex: Pattern) -> Optional[Union[str, List[int]]]:
+        """
+
+        :param regex: compiled token pattern
+        :return: the literal text every match starts with, None if it can't be worked out
+        """
+
+        parsed = DispatchScanner.parse(regex)
+        if parsed is None or regex.flags & re.IGNORECASE:
+            return None
+        chars = []
+        for op, av in parsed:
+            if op is not sre_constants.LITERAL:
+                break
+            chars += [av]
+        return ''.join(map(chr, chars)) if isinstance(regex.pattern, str) else chars
+
+    def later(self, string: Union[str, bytes], pos: int, best: int) -> List[Tuple[int, Pattern]]:
+        """
+        Embedded token patterns defined after best that can match at pos.
+
+        :param string: text to scan
+        :param pos: position of the token start in string
+        :param best: the first token defined that matches at pos
+        :return:
+        """
+
+        char = string[pos] if pos < len(string) else None
+        try:
+            later = self.later_cache[best, char]
+        except KeyError:
+            later = [item for item in self.index.get(char, self.anywhere) if item[0] > best]
+            self.later_cache[best, char] = later
+        node = self.trie.get(char)
+        n = pos + 1
+        while node is not None:
+            if None in node:
+                later = [item for item in node[None] if item[0] > best] + later
+            if n >= len(string):
+                break
+            node = node.get(string[n])
+            n += 1
+        return later
+
+    def match(self, string: Union[str, bytes], pos: int = 0) -> Tuple[Optional[Hashable], int]:
+        """
+
+        :param string: text to scan
+        :param pos: position of the token start in string
+        :return: (token type or None, end of the match)
+        """
+
+        best, end = -1, -1
+        match = self.master.match(string, pos) if self.master is not None else None
+        if match is not None:
+            if match.lastindex in self.final:
+                return self.final[match.lastindex], match.end()
+            best, end = self.owner[match.lastindex], match.end()
+            # Only a longer match beats the first token defined
+            for n, regex in self.later(string, pos, best):
+                match = regex.match(string, pos)
+                if match is not None and (match.end() > end or (match.end() == end and n < best)):
+                    best, end = n, match.end()
+        for n, regex in self.rest:
+            match = regex.match(string, pos)
+            if match is not None and (match.end() > end or (match.end() == end and n < best)):
+                best, end = n, match.end()
+        if best < 0:
+            return None, pos
+        return self.types[best], end
+
+    def tried(self, string: Union[str, bytes], pos: int = 0) -> int:
+        """
+
+        :param string: text to scan
+        :param pos: position of the token start in string
+        :return: number of regex match calls match() makes at pos, the trie walk not counted
+        """
+
+        if self.master is None:
+            return len(self.rest)
+        match = self.master.match(string, pos)
+        if match is None:
+            return 1 + len(self.rest)
+        if match.lastindex in self.final:
+            return 1
+        return 1 + len(self.later(string, pos, self.owner[match.lastindex])) + len(self.rest)
+
+
+class DispatchScanner(Scanner):
+    """
+    Finds the longest token match at a position by trying only the token patterns that can start with the character
+    there.
+
+    Patterns made only of literal characters are kept in a trie walked along the text. For the others, the set of
+    characters a match can start with is worked out from the parsed pattern, giving a table from character to
+    candidate patterns. Patterns whose first character can't be worked out, or that can match empty text, are
+    tried at every position. Results are those of Scanner.
+    """
+
+    # Widest character range enumerated into the table
+    RANGE = 1024
+
+    def __init__(self, tokens: Dict[Hashable, Pattern]):
+        """
+
+        :param tokens: compiled patterns keyed by token type, in definition order
+        """
+
+        super().__init__(tokens)
+        self.types: List[Hashable] = list(tokens.keys())
+        self.trie: Dict[Any, Any] = {}
+        self.anywhere: List[Tuple[int, Pattern]] = []
+        starts: Dict[Union[str, int], List[int]] = {}
+        for n, regex in enumerate(tokens.values()):
+            literal = self.literal(regex)
+            if literal is not None:
+                node = self.trie
+                for char in literal:
+                    node = node.setdefault(char, {})
+                # The first token defined wins ties
+                node.setdefault(None, n)
+                continue
+            first = self.first(regex)
+            if first is None:
+                self.anywhere += [(n, regex)]
+                continue
+            for char in first:
+                starts.setdefault(char, []).append(n)
+        regexes = list(tokens.values())
+        self.index: Dict[Union[str, int], List[Tuple[int, Pattern]]] = {}
+        for char, ns in starts.items():
+            ns = sorted(set(ns) | {n for n, _ in self.anywhere})
+            self.index[char] = [(n, regexes[n]) for n in ns]
+
+    @staticmethod
+    def parse(regex: Pattern) -> Optional[List]:
+        """
+
+        :param regex: compiled token pattern
+        :return: the parsed pattern, or None if it can't be analyzed
+        """
+
+        try:
+            return sre_parse.parse(regex.pattern, regex.flags)
+        except Exception:
+            return None
+
+    @classmethod
+    def literal(cls, regex: Pattern) -> Optional[Union[str, List[int]]]:
+        """
+
+        :param regex: compiled token pattern
+        :return: the text the pattern matches if it only matches that text, else None
+        """
+
+        parsed = cls.parse(regex)
+        if parsed is None or not len(parsed) or regex.flags & re.IGNORECASE:
+            return None
+        if any(op is not sre_constants.LITERAL for op, _ in parsed):
+            return None
+        chars = [av for _, av in parsed]
+        return ''.join(map(chr, chars)) if isinstance(regex.pattern, str) else chars
+
+    @classmethod
+    def first(cls, regex: Pattern) -> Optional[FrozenSet[Union[str, int]]]:
+        """
+
+        :param regex: compiled token pattern
+        :return: the characters a match can start with, or None if unknown or the pattern can match empty text
+        """
+
+        parsed = cls.parse(regex)
+        if parsed is None or regex.flags & re.IGNORECASE:
+            return None
+        chars, nullable = cls.first_of(parsed)
+        if chars is None or nullable:
+            return None
+        if isinstance(regex.pattern, str):
+            return frozenset(map(chr, chars))
+        return frozenset(chars)
+
+    @classmethod
+    def first_of(cls, items: Any) -> Tuple[Optional[set], bool]:
+        """
+        Characters a sequence of parsed items can start with.
+
+        :param items: parsed pattern or subpattern
+        :return: (character codes, or None if unknown, whether the sequence can match empty text)
+        """
+
+        c = sre_constants
+        chars = set()
+        for op, av in items:
+            if op is c.LITERAL:
+                chars.add(av)
+                return chars, False
+            if op is c.IN:
+                for item_op, item_av in av:
+                    if item_op is c.LITERAL:
+                        chars.add(item_av)
+                    elif item_op is c.RANGE and item_av[1] - item_av[0] < cls.RANGE:
+                        chars.update(range(item_av[0], item_av[1] + 1))
+                    else:
+                        return None, False
+                return chars, False
+            if op is c.AT or op is c.ASSERT or op is c.ASSERT_NOT:
+                # Zero width, the next items give the first character
+                continue
+            if op is c.SUBPATTERN:
+                if av[1] & re.IGNORECASE:
+                    return None, False
+                sub, nullable = cls.first_of(av[3])
+            elif op is c.BRANCH:
+                sub, nullable = set(), False
+                for branch in av[1]:
+                    part, part_nullable = cls.first_of(branch)
+                    if part is None:
+                        return None, False
+                    sub |= part
+                    nullable = nullable or part_nullable
+            elif op in (c.MAX_REPEAT, c.MIN_REPEAT, getattr(c, 'POSSESSIVE_REPEAT', c.MAX_REPEAT)):
+                sub, nullable = cls.first_of(av[2])
+                nullable = nullable or av[0] == 0
+            elif op is getattr(c, 'ATOMIC_GROUP', None):
+                sub, nullable = cls.first_of(av)
+            else:
+                return None, False
+            if sub is None:
+                return None, False
+            chars |= sub
+            if not nullable:
+                return chars, False
+        return chars, True
+
+    def match(self, string: Union[str, bytes], pos: int = 0) -> Tuple[Optional[Hashable], int]:
+        """
+
+        :param string: text to scan
+        :param pos: position of the token start in string
+        :return: (token type or None, end of the match)
+        """
+
+        best, end = -1, -1
+        node = self.trie
+        n = pos
+        while True:
+            if None in node:
+                best, end = node[None], n
+            if n >= len(string):
+                break
+            node = node.get(string[n])
+            if node is None:
+                break
+            n += 1
+        regexes = self.index.get(string[pos], self.anywhere) if pos < len(string) else self.anywhere
+        for n, regex in regexes:
+            match = regex.match(string, pos)
+            if match is not None and (match.end() > end or (match.end() == end and n < best)):
+                best, end = n, match.end()
+        if best < 0:
+            return None, pos
+        return self.types[best], end
+
+    def tried(self, string: Union[str, bytes], pos: int = 0) -> int:
+        """
+
+        :param string: text to scan
+        :param pos: position of the token start in string
+        :return: number of regex match calls match() makes at pos, the trie walk not counted
+        """
+
+        return len(self.index.get(string[pos], self.anywhere) if pos < len(string) else self.anywhere)
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple, Union
+
+from time import perf_counter
+
+
+class Observer:
+    """
+    Receives what a Lexer or Parser does, once set as their observer.
+
+    The methods receiving events do nothing, subclasses override them as callbacks. Time is split into phases:
+    "lex" (lexing tokens), "parse" (the LL(1) table loop), "build" (building the tree), "action" (running actions)
+    and "eval" (walking a tree to evaluate it). Phases nest, and time is given to the innermost one, so phase times
+    add up without overlap. Observing makes lexing and parsing slower; without an observer nothing is recorded.
+    """
+
+    class Scanner:
+        """
+        Scanner reporting each match to an observer.
+        """
+
+        def __init__(self, scanner: Any, observer: Observer):
+            """
+
+            :param scanner:
+            :param observer:
+            """
+
+            self.scanner = scanner
+            self.observer = observer
+
+        def match(self, string: Union[str, bytes], pos: int = 0) -> Tuple[Optional[Hashable], int]:
+            """
+
+            :param string:
+            :param pos:
+            :return:
+            """
+
+            observer = self.observer
+            observer.push("lex")
+            try:
+                ttype, end = self.scanner.match(string, pos)
+            finally:
+                observer.pop()
+            observer.token(ttype, self.scanner.tried(string, pos))
+            return ttype, end
+
+        def __getattr__(self, name: str) -> Any:
+            return getattr(self.scanner, name)
+
+    class Builder:
+        """
+        Tree builder of an LL1.Driver reporting expansions and the time spent building to an observer.
+        """
+
+        def __init__(self, builder: Any, observer: Observer):
+            """
+
+            :param builder:
+            :param observer:
+            """
+
+            self.builder = builder
+            self.observer = observer
+
+        def enter(self, prod: int, token: Any):
+            self.observer.expand(prod)
+            self.observer.push("build")
+            try:
+                self.builder.enter(prod, token)
+            finally:
+                self.observer.pop()
+
+        def shift(self, token: Any):
+            self.observer.push("build")
+            try:
+                self.builder.shift(token)
+            finally:
+                self.observer.pop()
+
+        def exit(self, prod: int):
+            self.observer.push("build")
+            try:
+                self.builder.exit(prod)
+            finally:
+                self.observer.pop()
+
+        def __getattr__(self, name: str) -> Any:
+            return getattr(self.builder, name)
+
+    def __init__(self):
+        self.stack: List[str] = []
+        self.mark = 0.0
+
+    def phase(self, name: str, seconds: float):
+        """
+        Called with time spent in a phase, possibly many times for one run.
+
+        :param name:
+        :param seconds:
+        :return:
+        """
+
+    def token(self, ttype: Optional[Hashable], attempts: int):
+        """
+        Called for each token matched, skipped ones included.
+
+        :param ttype: type of the token, None when no pattern matched
+        :param attempts: number of regex match calls tried
+        :return:
+        """
+
+    def expand(self, prod: int):
+        """
+        Called when a production is expanded, or reduced by an LALR1 parser.
+
+        :param prod: index of the production
+        :return:
+        """
+
+    def action(self, key: Hashable, seconds: float):
+        """
+        Called after an action ran.
+
+        :param key: key of the action, the production index for parser actions
+        :param seconds:
+        :return:
+        """
+
+    def push(self, name: str):
+        """
+        Enters a phase, giving the time since the last change to the enclosing one.
+
+        :param name:
+        :return:
+        """
+
+        now = perf_counter()
+        if self.stack:
+            self.phase(self.stack[-1], now - self.mark)
+        self.stack.append(name)
+        self.mark = now
+
+    def pop(self):
+        """
+        Leaves the current phase, giving it the time since the last change.
+
+        :return:
+        """
+
+        now = perf_counter()
+        self.phase(self.stack.pop(), now - self.mark)
+        self.mark = now
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """
+
+        :param name: phase
+        :param func:
+        :return: func, running in phase name
+        """
+
+        def timed(*args, **kwargs):
+            self.push(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.pop()
+
+        return timed
+
+    def timed_tokens(self, t_iter: Iterator) -> Iterator:
+        """
+
+        :param t_iter:
+        :return: t_iter, advancing in phase "lex"
+        """
+
+        while True:
+            self.push("lex")
+            try:
+                token = next(t_iter, None)
+            finally:
+                self.pop()
+            if token is None:
+                return
+            yield token
+
+    def timed_actions(self, actions: Dict[Hashable, Callable]) -> Dict[Hashable, Callable]:
+        """
+
+        :param actions:
+        :return: actions, each running in phase "action" and reported to action()
+        """
+
+        def wrap(key: Hashable, func: Callable) -> Callable:
+            def action(vals):
+                self.push("action")
+                start = perf_counter()
+                try:
+                    return func(vals)
+                finally:
+                    self.pop()
+                    self.action(key, perf_counter() - start)
+
+            return action
+
+        return {key: wrap(key, func) for key, func in actions.items()}
+
+
+class Stats(Observer):
+    """
+    Observer adding up what it receives.
+
+    times holds seconds by phase, tokens the number of tokens by type and attempts the number of regex match calls.
+    expansions holds the number of expansions by production index, and calls and action_times the number of calls
+    and seconds by action key.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.times: Dict[str, float] = {}
+        self.tokens: Dict[Optional[Hashable], int] = {}
+        self.attempts = 0
+        self.expansions: Dict[int, int] = {}
+        self.calls: Dict[Hashable, int] = {}
+        self.action_times: Dict[Hashable, float] = {}
+
+    def phase(self, name: str, seconds: float):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def token(self, ttype: Optional[Hashable], attempts: int):
+        self.tokens[ttype] = self.tokens.get(ttype, 0) + 1
+        self.attempts += attempts
+
+    def expand(self, prod: int):
+        self.expansions[prod] = self.expansions.get(prod, 0) + 1
+
+    def action(self, key: Hashable, seconds: float):
+        self.calls[key] = self.calls.get(key, 0) + 1
+        self.action_times[key] = self.action_times.get(key, 0.0) + seconds
+
+    def report(self, productions: Optional[List[Any]] = None) -> str:
+        """
+
+        :param productions: productions by index, to name them instead of giving their index
+        :return: the stats as text
+        """
+
+        def name(prod: Hashable) -> str:
+            if productions is not None and isinstance(prod, int) and 0 <= prod < len(productions):
+                return str(productions[prod])
+            return str(prod)
+
+        lines = ["phases:"]
+        lines += ["  {:<8} {:>10.3f} ms".format(phase, seconds * 1000) for phase, seconds in self.times.items()]
+        lines += ["tokens: {} ({} regex matches)".format(sum(self.tokens.values()), self.attempts)]
+        lines += ["  {:<20} {:>8}".format(str(t), n) for t, n in sorted(self.tokens.items(), key=lambda i: -i[1])]
+        lines += ["expansions:"]
+        lines += ["  {:<40} {:>8}".format(name(p), n) for p, n in sorted(self.expansions.items(), key=lambda i: -i[1])]
+        lines += ["actions:"]
+        lines += ["  {:<40} {:>8} {:>10.3f} ms".format(name(key), self.calls[key], seconds * 1000)
+                  for key, seconds in sorted(self.action_times.items(), key=lambda i: -i[1])]
+        return "\n".join(lines)
@@ -1,3 +1,6 @@
 from .parser import *
 from .ast import *
 from .ll1 import *
+from .lalr import *
+from .flat import *
+from .codegen import *
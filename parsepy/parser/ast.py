@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from typing import Any, Optional, Callable, Union
+from typing import Any, Optional, Callable, Union, Dict, List
 
 from parsepy.lexer import Token
-from parsepy.parser import CFG
+from parsepy.parser.cfg import CFG
 
 
 class AST:
@@ -11,26 +11,236 @@ class AST:
 
     """
 
-    def __init__(self, value: Union[CFG.Prod, Token], text: str, evalfn: Optional[Callable] = None,
-                 line: int = 1, col: int = 1, file: Optional[str] = None, parent: AST = None):
+    class Evaluator:
+        """
+        Evaluates an AST post-order with an explicit stack, calling the evalfn of each node once.
+
+        An evaluation is started with start() and run by step(), which can stop after some number of calls and be
+        called again to resume. The values of the nodes evaluated this way are kept in values and reused when an
+        enclosing tree is evaluated later.
+        """
+
+        def __init__(self, root: AST):
+            """
+
+            :param root:
+            """
+
+            self.root = root
+            self.values: Dict[int, Any] = {}
+            self.target: Optional[AST] = None
+            self.frames: List[List[Any]] = []
+
+        @property
+        def done(self) -> bool:
+            """
+
+            :return: True once the started evaluation is finished
+            """
+
+            return not self.frames
+
+        def start(self, node: Optional[AST] = None):
+            """
+            Starts evaluating node, dropping any unfinished evaluation.
+
+            :param node: node of the tree, root if None
+            :return:
+            """
+
+            self.target = self.root if node is None else node
+            self.frames = [] if id(self.target) in self.values else [[self.target, [self.target], 0]]
+
+        def step(self, count: int = -1) -> bool:
+            """
+            Resumes the started evaluation.
+
+            :param count: maximum number of evalfn calls, no limit if negative
+            :return: True once the started evaluation is finished
+            """
+
+            frames = self.frames
+            values = self.values
+            while frames and count:
+                frame = frames[-1]
+                node = frame[0]
+                children = node.children
+                n = frame[2]
+                if n < len(children):
+                    frame[2] = n + 1
+                    child = children[n]
+                    if id(child) in values:
+                        frame[1].append(values[id(child)])
+                    elif child._children:
+                        frames.append([child, [child], 0])
+                    else:
+                        frame[1].append(child.evalfn([child]))
+                        count -= 1
+                    continue
+                frames.pop()
+                value = node.evalfn(frame[1])
+                count -= 1
+                if frames:
+                    frames[-1][1].append(value)
+                else:
+                    values[id(node)] = value
+            return not frames
+
+        @property
+        def value(self) -> Any:
+            """
+
+            :return: value of the finished evaluation
+            """
+
+            if self.frames or self.target is None:
+                raise ValueError("evaluation is not finished")
+            return self.values[id(self.target)]
+
+        def eval(self, node: Optional[AST] = None) -> Any:
+            """
+            Evaluates node to the end.
+
+            :param node: node of the tree, root if None
+            :return:
+            """
+
+            self.start(node)
+            self.step()
+            return self.value
+
+    __slots__ = ('_value', '_line', '_col', '_text', '_file', '_evalfn', '_children', '_parent', '_shift', 'start',
+                 'end', 'source', 'actions')
+
+    def __init__(self, value: Union[CFG.Prod, Token], text: Optional[str], evalfn: Optional[Callable] = None,
+                 line: int = 1, col: int = 1, file: Optional[str] = None, parent: AST = None, start: int = -1,
+                 end: int = -1, source: Optional[str] = None):
         """
 
         :param value:
+        :param text: raw text of the node, None to slice it from source when first read
         :param evalfn:
         :param parent:
+        :param start: offset of the node in source
+        :param end: offset just past the node in source
+        :param source: text the node was parsed from
         """
 
         self.value = value
         self.line = line
         self.col = col
+        self.start = start
+        self.end = end
+        self.source = source
+        self.actions = None
         self.text = text
         self.file = file
         self.evalfn = evalfn
         self._children = []
+        self._shift = None
         self.parent = parent
 
+    @classmethod
+    def make(cls, value: Union[CFG.Prod, Token], line: int, col: int, file: str, start: int, end: int,
+             source: Optional[str] = None, text: Optional[str] = None,
+             actions: Optional[Dict[int, Callable]] = None, parent: Optional[AST] = None) -> AST:
+        """
+        Builds a node without validating its fields, for parsers that already produce valid ones.
+
+        :param value:
+        :param line:
+        :param col:
+        :param file:
+        :param start:
+        :param end:
+        :param source:
+        :param text:
+        :param actions: actions by production index, used to find evalfn when the node is evaluated
+        :param parent: node built by make() to add the node to as its last child
+        :return:
+        """
+
+        node = cls.__new__(cls)
+        node._value = value
+        node._line = line
+        node._col = col
+        node._file = file
+        node.start = start
+        node.end = end
+        node.source = source
+        node._text = text
+        node._evalfn = None
+        node.actions = actions
+        node._children = []
+        node._parent = parent
+        node._shift = None
+        if parent is not None:
+            parent._children.append(node)
+        return node
+
+    def move(self, source: Optional[str], file: str, delta: int = 0, lines: int = 0, line: int = 0, cols: int = 0):
+        """
+        Moves the subtree to another source, shifting offsets by delta, lines by lines and columns on line by cols.
+
+        Only the node is changed at once, its descendants are changed when they are reached through children, so
+        moving a large subtree costs the same as a small one.
+
+        :param source:
+        :param file:
+        :param delta:
+        :param lines:
+        :param line: line whose columns are shifted, before the shift
+        :param cols:
+        :return:
+        """
+
+        shift = (source, file, delta, lines, line, cols)
+        AST._move(self, shift)
+        if self._children:
+            self._shift = (shift, ) if self._shift is None else self._shift + (shift, )
+
+    @staticmethod
+    def _move(node: AST, shift: tuple):
+        """
+        Applies a shift of move() to node and its token, not to its descendants.
+
+        :param node:
+        :param shift:
+        :return:
+        """
+
+        source, file, delta, lines, line, cols = shift
+        node.source = source
+        for item in (node, node._value) if isinstance(node._value, Token) else (node, ):
+            if delta:
+                item.start += delta
+                item.end += delta
+            if cols and item.line == line:
+                item.col += cols
+            if lines:
+                item.line += lines
+            if item.file != file:
+                item.file = file
+
+    def _resolve(self):
+        """
+        Applies the shifts pending from move() to the children, which hold them for their own children.
+
+        :return:
+        """
+
+        shifts = self._shift
+        self._shift = None
+        for child in self._children:
+            for shift in shifts:
+                AST._move(child, shift)
+            if child._children:
+                child._shift = shifts if child._shift is None else child._shift + shifts
+
     @property
     def children(self):
+        if self._shift is not None:
+            self._resolve()
         return self._children
 
     @children.setter
@@ -83,7 +293,7 @@ class AST:
     @file.setter
     def file(self, file):
         if file is None:
-            self._file = str(type(self.text))
+            self._file = repr(str)
         elif isinstance(file, str):
             self._file = file
         else:
@@ -91,28 +301,55 @@ class AST:
 
     @property
     def evalfn(self):
-        return self._evalfn
+        if self._evalfn is not None:
+            return self._evalfn
+        if isinstance(self._value, CFG.Prod):
+            if self.actions is not None and self._value.idx in self.actions:
+                return self.actions[self._value.idx]
+            return AST.eval_prod
+        return AST.eval_token
 
     @evalfn.setter
     def evalfn(self, evalfn):
         if not callable(evalfn) and evalfn is not None:
             raise ValueError("evalfn must be callable")
-        if evalfn is None:
-            if isinstance(self.value, CFG.Prod):
-                self._evalfn = lambda a: None
-            else:
-                self._evalfn = lambda a: self.value
-        else:
-            self._evalfn = evalfn
+        self._evalfn = evalfn
+
+    @staticmethod
+    def eval_prod(vals: List) -> Any:
+        """
+        evalfn of productions without an action.
+
+        :param vals:
+        :return:
+        """
+
+        return None
+
+    @staticmethod
+    def eval_token(vals: List) -> Any:
+        """
+        evalfn of tokens, the Token itself.
+
+        :param vals:
+        :return:
+        """
+
+        return vals[0].value
 
     @property
     def text(self):
+        if self._text is None:
+            if self.source is not None:
+                self._text = self.source[self.start:self.end]
+            else:
+                self._text = ''.join(c.text for c in self.children)
         return self._text
 
     @text.setter
     def text(self, text):
-        if not isinstance(text, str):
-            raise ValueError("text must be str")
+        if not isinstance(text, str) and text is not None:
+            raise ValueError("text must be str or None")
         self._text = text
 
     @property
@@ -140,7 +377,12 @@ class AST:
         :return:
         """
 
-        self.children += [child]
+        if not isinstance(child, AST):
+            raise ValueError("children must be an list or tuple of AST objects or an AST object")
+        if self._shift is not None:
+            self._resolve()
+        child._parent = self
+        self._children.append(child)
 
     def remove_child(self, child: AST):
         self.parent.children = [c for c in self.parent.children if c is not child]
@@ -151,11 +393,51 @@ class AST:
         :return:
         """
 
-        vals = [self]
-        for c in self:
-            vals += [c.eval()]
-        ans = self.evalfn(vals)
-        return self.evalfn(vals)
+        return AST.Evaluator(self).eval()
+
+    def __reduce__(self):
+        """
+        Pickles the subtree as a flat list of nodes, so deep trees don't reach the recursion limit. evalfn and
+        actions are code and are not pickled.
+
+        :return:
+        """
+
+        nodes = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            nodes.append((node._value, node._line, node._col, node._file, node.start, node.end, node._text,
+                          len(node._children)))
+            stack.extend(reversed(node.children))
+        return AST._unpickle, (nodes, self.source)
+
+    @staticmethod
+    def _unpickle(nodes: List[tuple], source: Optional[str]) -> AST:
+        """
+        Rebuilds a subtree pickled by __reduce__.
+
+        :param nodes: fields and child count of the nodes, in preorder
+        :param source:
+        :return:
+        """
+
+        root = None
+        # Nodes still missing children, with the number missing
+        open_nodes = []
+        for value, line, col, file, start, end, text, count in nodes:
+            node = AST.make(value, line, col, file, start, end, source, text)
+            if open_nodes:
+                parent = open_nodes[-1]
+                parent[0].add_child(node)
+                parent[1] -= 1
+                if not parent[1]:
+                    open_nodes.pop()
+            else:
+                root = node
+            if count:
+                open_nodes.append([node, count])
+        return root
 
     def __getitem__(self, idx: int) -> AST:
         """
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any, List, Union, Hashable, Set, Iterator
+from typing import Any, Dict, List, Optional, Union, Hashable, Set, Iterator
 
 from parsepy.parser import error
 from parsepy.lexer.lexer import Lexer
@@ -127,6 +127,100 @@ class CFG:
 
             return iter(self.prod)
 
+    class Analysis:
+        """
+        Nullable, FIRST, FOLLOW and SELECT sets of a whole grammar, computed together by fixed-point iteration.
+
+        FIRST sets never hold EPSILON, nullable rules are kept in nullable instead.
+        """
+
+        def __init__(self, cfg: CFG):
+            """
+
+            :param cfg:
+            """
+
+            self.start = cfg.start
+            self.rules: Set[CFG.NonTerm] = set(p.rule for p in cfg.productions)
+            names = {r.name: r for r in self.rules}
+            self.terms: Set[Hashable] = set()
+
+            # Items of each production with rule names written as str resolved to Non-Terms
+            items = []
+            for prod in cfg.productions:
+                if prod:
+                    items += [[names.get(i, i) if isinstance(i, str) else i for i in prod]]
+                    self.terms |= set(i for i in items[-1] if not isinstance(i, CFG.NonTerm))
+                else:
+                    items += [[]]
+
+            self.nullable: Set[CFG.NonTerm] = set()
+            self.first: Dict[CFG.NonTerm, Set[Hashable]] = {r: set() for r in self.rules}
+            changed = True
+            while changed:
+                changed = False
+                for prod, its in zip(cfg.productions, items):
+                    f = self.first[prod.rule]
+                    size = len(f)
+                    if self.seq_first(its, f) and prod.rule not in self.nullable:
+                        self.nullable.add(prod.rule)
+                        changed = True
+                    changed |= size != len(f)
+
+            # FIRST of each suffix goes in FOLLOW of the item before it, then FOLLOW of each rule is propagated to
+            # the items that can end its productions
+            self.follow: Dict[CFG.NonTerm, Set[Hashable]] = {r: set() for r in self.rules}
+            if cfg.start in names:
+                self.follow[names[cfg.start]].add(Lexer.EOI)
+            links = []
+            for prod, its in zip(cfg.productions, items):
+                rest, nullable = set(), True
+                for item in reversed(its):
+                    if isinstance(item, CFG.NonTerm):
+                        self.follow[item] |= rest
+                        if nullable and item != prod.rule:
+                            links += [(prod.rule, item)]
+                        if item in self.nullable:
+                            rest = rest | self.first[item]
+                        else:
+                            rest, nullable = set(self.first[item]), False
+                    else:
+                        rest, nullable = {item}, False
+            changed = True
+            while changed:
+                changed = False
+                for rule, item in links:
+                    f = self.follow[item]
+                    size = len(f)
+                    f |= self.follow[rule]
+                    changed |= size != len(f)
+
+            self.select: Dict[CFG.Prod, Set[Hashable]] = {}
+            for prod, its in zip(cfg.productions, items):
+                out = set()
+                if self.seq_first(its, out):
+                    out |= self.follow[prod.rule]
+                self.select[prod] = out
+
+        def seq_first(self, items: List[Union[str, CFG.NonTerm]], out: Set[Hashable]) -> bool:
+            """
+            Adds FIRST of a sequence of items to out.
+
+            :param items:
+            :param out:
+            :return: True if every item is nullable
+            """
+
+            for item in items:
+                if isinstance(item, CFG.NonTerm):
+                    out |= self.first[item]
+                    if item not in self.nullable:
+                        return False
+                elif item != CFG.EPSILON:
+                    out.add(item)
+                    return False
+            return True
+
     def __init__(self, prods: List[CFG.Prod], start: Hashable = 'Start'):
         """
 
@@ -138,23 +232,58 @@ class CFG:
         self.productions = prods
         for n, prod in enumerate(self.productions):
             prod.idx = n
+        rules = set(p.rule for p in self.productions)
         for prod in self.productions:
             for i in prod:
-                if isinstance(i, CFG.NonTerm) and i not in self.rules:
+                if isinstance(i, CFG.NonTerm) and i not in rules:
                     raise error.CFGError("Undefined Non-Terminal: {}".format(i))
 
-        if start not in [r.name for r in self.rules]:
+        if start not in [r.name for r in rules]:
             raise error.CFGError("Invalid Start Rule: {}".format(start))
         self.start = start
 
     @property
-    def rules(self) -> List[CFG.NonTerm]:
+    def productions(self) -> List[CFG.Prod]:
+        """
+
+        :return:
+        """
+
+        return self._productions
+
+    @productions.setter
+    def productions(self, prods: List[CFG.Prod]):
+        self._productions = prods
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Drops the cached analysis. Assigning productions does this, changing the list in place does not.
+
+        :return:
+        """
+
+        self._analysis = None
+
+    def analyze(self) -> CFG.Analysis:
+        """
+        Analysis of the grammar, computed on first use and cached until productions or start change.
+
+        :return:
+        """
+
+        if self._analysis is None or self._analysis.start != self.start:
+            self._analysis = CFG.Analysis(self)
+        return self._analysis
+
+    @property
+    def rules(self) -> Set[CFG.NonTerm]:
         """
 
         :return:
         """
 
-        return set(p.rule for p in self.productions)
+        return set(self.analyze().rules)
 
     def __contains__(self, item):
         """
@@ -164,68 +293,48 @@ class CFG:
         """
 
         if isinstance(item, CFG.NonTerm):
-            return item in self.rules
+            return item in self.analyze().rules
         elif isinstance(item, CFG.Prod):
             return item in self.productions
         raise TypeError("unsupported operand type(s) for in: '{}' and '{}'".format(item.__class__, self.__class__))
 
-    def first(self, rule: Union[CFG.NonTerm, str, CFG.EPSILON.__class__, List[Union[CFG.NonTerm, str, CFG.EPSILON.__class__]]]) -> Set[Union[Hashable, CFG.EPSILON.__class__]]:
+    def _rule(self, rule: Union[CFG.NonTerm, str], name: str) -> Optional[CFG.NonTerm]:
         """
+        Resolves a Non-Term or the name of one, None for anything else.
 
-        :param rule:
-        :return:
+        :raise CFGError:
+            When rule is a Non-Term that is not in the grammar
         """
 
-        if isinstance(rule, list):
-            f = set()
-            for r in rule:
-                f |= self.first(r)
-                if CFG.EPSILON in f:
-                    f -= {CFG.EPSILON}
-                else:
-                    return f
-            return f | {CFG.EPSILON}
-
-        # { X in terminals }
+        if isinstance(rule, CFG.NonTerm):
+            if rule not in self.analyze().rules:
+                raise error.CFGError("Non-Term({}) is not a rule".format(rule))
+            return rule
         if isinstance(rule, str) or rule == CFG.EPSILON:
-            if rule in (r.name for r in self.rules):
-                rule = CFG.NonTerm(rule)
-            else:
-                return {rule}
-        elif not isinstance(rule, CFG.NonTerm):
-            raise TypeError("unsupported type: {} for FIRST".format(rule.__class__))
+            rule = CFG.NonTerm(rule)
+            return rule if rule in self.analyze().rules else None
+        raise TypeError("unsupported type: {} for {}".format(rule.__class__, name))
 
-        if rule not in self:
-            raise error.CFGError("Non-Term({}) is not a rule".format(rule))
+    def first(self, rule: Union[CFG.NonTerm, str, CFG.EPSILON.__class__, List[Union[CFG.NonTerm, str, CFG.EPSILON.__class__]]]) -> Set[Union[Hashable, CFG.EPSILON.__class__]]:
+        """
 
-        out = set()
+        :param rule:
+        :return:
+        """
 
-        for prod in self.productions:
-            if prod.rule == rule:
-                pout = set()
-
-                # epsilon if X -> epsilon exists
-                if not prod:
-                    out |= {CFG.EPSILON}
-                    continue
-                ep = True
-                for item in prod:
-
-                    # FIRST(item)
-                    f = self.first(item)
-                    pout |= f
-
-                    # FIRST(Yi) for X -> Y1 Y2 .. Yk if for all j < i < k epsilon is in FIRST(Yj)
-                    if CFG.EPSILON not in f:
-                        ep = False
-                        break
-
-                # All items can go to epsilon
-                if ep:
-                    out |= {CFG.EPSILON}
-
-                # May be unnecessary, possible 'Lacks Pairwise Disjointness Detection
-                out |= pout
+        analysis = self.analyze()
+        if isinstance(rule, list):
+            out = set()
+            items = [self._rule(r, "FIRST") or r for r in rule]
+            return out | {CFG.EPSILON} if analysis.seq_first(items, out) else out
+
+        nt = self._rule(rule, "FIRST")
+        if nt is None:
+            # { X in terminals }
+            return {rule}
+        out = set(analysis.first[nt])
+        if nt in analysis.nullable:
+            out.add(CFG.EPSILON)
         return out
 
     def follow(self, rule: CFG.NonTerm) -> Set[Union[Hashable, Lexer.EOI.__class__]]:
@@ -235,39 +344,10 @@ class CFG:
         :return:
         """
 
-        if not isinstance(rule, CFG.NonTerm):
-            if rule in (r.name for r in self.rules):
-                rule = CFG.NonTerm(rule)
-            else:
-                raise TypeError("unsupported type: {} for FIRST".format(rule.__class__))
-
-        if rule not in self:
-            raise error.CFGError("Non-Term({}) is not a rule".format(rule))
-
-        out = set()
-
-        # $ in FOLLOW(X) if X is start rule
-        if self.start == rule.name:
-            out |= {Lexer.EOI}
-
-        # Find rule in productions
-        for prod in self.productions:
-            for i in range(len(prod)):
-                if prod[i] == rule:
-
-                    # X -> aB, FOLLOW(X) is in FOLLOW(B)
-                    if i + 1 == len(prod):
-                        if rule != prod.rule:
-                            out |= self.follow(prod.rule)
-
-                    # X -. aBb
-                    else:
-                        f = self.first(prod[i+1:])
-                        if CFG.EPSILON in f:
-                            if rule != prod.rule:
-                                out |= self.follow(prod.rule)
-                        out |= f - {CFG.EPSILON}
-        return out
+        nt = self._rule(rule, "FOLLOW")
+        if nt is None:
+            raise TypeError("unsupported type: {} for FOLLOW".format(rule.__class__))
+        return set(self.analyze().follow[nt])
 
     def select(self, prod: CFG.Prod) -> Set[Hashable, Lexer.EOI.__class__]:
         """
@@ -276,6 +356,9 @@ class CFG:
         :return:
         """
 
+        analysis = self.analyze()
+        if prod in analysis.select:
+            return set(analysis.select[prod])
         out = self.first(prod.prod)
         if CFG.EPSILON in out:
             out = (out - {CFG.EPSILON}) | self.follow(prod.rule)
@@ -318,11 +401,7 @@ class CFG:
         :return:
         """
 
-        out = set()
-        for prod in self.productions:
-            if prod:
-                out |= set(prod.prod)
-        return out - self.rules
+        return set(self.analyze().terms)
 
     def printCFG(self):
         print("Start: {}".format(self.start))
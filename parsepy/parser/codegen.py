@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+from ast import literal_eval
+from os import PathLike
+
+from parsepy.lexer import Lexer
+from parsepy.lexer.scanner import MasterScanner
+from parsepy.parser import CFG
+from parsepy.parser.ll1 import LL1
+
+
+class CodeGen:
+    """
+    Writes a Python module that parses one grammar without the runtime LL1 engine.
+
+    The module has a recursive descent function per rule that dispatches on the lookahead token type, loops on
+    productions ending with their own rule instead of recursing, and matches tokens with a MasterScanner of the
+    Lexer's patterns, calling its master regex directly for the tokens it settles. Its parse() returns an AST equal
+    to that of LL1.parse() and its evaluate() the same value as LL1.eval(). Node building is most of the time of
+    parse(), so it gains less over LL1.parse() than evaluate() does over LL1.eval().
+    Lexer and parser actions are code, so they are passed to those functions rather than generated. As the functions
+    recurse once per nested rule, input nested deeper than the Python recursion limit allows (a few hundred levels
+    of parentheses with the default limit) raises a ParserError, where LL1.parse() keeps its stack in a list.
+    """
+
+    HEADER = '''\
+# Generated by parsepy.parser.codegen, do not edit.
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import re
+
+from parsepy.lexer import Lexer, Token
+from parsepy.lexer.scanner import MasterScanner
+from parsepy.parser import AST, CFG, error
+'''
+
+    RUNTIME = '''
+
+class _Tokens:
+    """
+    Lexer state over the text being parsed, tok is the lookahead token.
+    """
+
+    def __init__(self, text: str, file: str, actions: Dict[Hashable, Callable[[str], Any]]):
+        self.text = text
+        self.file = file
+        self.actions = actions
+        self.pos = 0
+        self.line = 1
+        self.line_start = 0
+        self.last_end = -1
+        self.tok = None
+        self.advance()
+
+    def advance(self):
+        text = self.text
+        actions = self.actions
+        pos = self.pos
+        while pos < len(text):
+{scan}
+            chars = text[pos:end]
+            value = actions[ttype](chars) if ttype in actions else chars
+            tok = None
+            if value is not None:
+                tok = Token(ttype, value, chars, self.line, pos - self.line_start + 1, self.file, pos, end)
+            lines = text.count('\\n', pos, end)
+            if lines:
+                self.line += lines
+                self.line_start = text.rfind('\\n', pos, end) + 1
+            pos = end
+            if tok is not None:
+                self.pos = pos
+                self.tok = tok
+                return
+        self.pos = pos
+        if text:
+            # A final newline doesn't start a line
+            last = text.rfind('\\n', 0, len(text) - 1) + 1
+            self.tok = Token(Lexer.EOI, None, '', text.count('\\n', 0, len(text) - 1) + 1, len(text) - last,
+                             self.file, len(text), len(text))
+        else:
+            self.tok = Token(Lexer.EOI, None, '', -1, -1, self.file, 0, 0)
+
+
+def _fail(tok: Token, expected):
+    if tok.type not in _TERMS or Lexer.UNK == tok.type:
+        raise error.UnkToken(tok)
+    raise error.UnexpToken(tok, set(expected))
+
+
+def _close(node: AST, lx: _Tokens):
+    if lx.last_end > node.start:
+        node.end = lx.last_end
+
+
+def _act(vals, lx: _Tokens, actions):
+    _close(vals[0], lx)
+    action = actions.get(vals[0].value.idx)
+    return action(vals) if action is not None else None
+'''
+
+    API = '''
+
+def _rule(start: Optional[Hashable]):
+    start = START if start is None else start
+    if start not in _RULES:
+        raise error.ParserError("Invalid Start Rule: {}".format(start))
+    return _RULES[start]
+
+
+def _too_deep(lx: _Tokens) -> error.ParserError:
+    return error.ParserError("Input nested too deeply for the generated parser at {}:{}:{}, use LL1.parse() or "
+                             "raise sys.setrecursionlimit()".format(lx.file, lx.tok.line, lx.tok.col))
+
+
+def parse(text: str, actions: Optional[Dict[int, Callable]] = None, start: Optional[Hashable] = None,
+          file: Optional[str] = None, lexer_actions: Optional[Dict[Hashable, Callable[[str], Any]]] = None) -> AST:
+    """
+    Parses text into an AST, as LL1.parse().
+
+    :param text:
+    :param actions: parser actions, used when the AST is evaluated
+    :param start: name of the start rule, START if None
+    :param file:
+    :param lexer_actions:
+    :raise ParserError:
+        When text is nested deeper than the recursion limit allows
+    :return:
+    """
+
+    fn = _rule(start)[0]
+    file = str(type(text)) if file is None else str(file)
+    lx = _Tokens(text, file, {} if lexer_actions is None else lexer_actions)
+    holder = AST.make(None, 1, 1, file, 0, 0)
+    try:
+        fn(lx, holder, actions)
+    except RecursionError:
+        raise _too_deep(lx) from None
+    root = holder[0]
+    root.parent = None
+    return root
+
+
+def evaluate(text: str, actions: Optional[Dict[int, Callable]] = None, start: Optional[Hashable] = None,
+             file: Optional[str] = None, lexer_actions: Optional[Dict[Hashable, Callable[[str], Any]]] = None) -> Any:
+    """
+    Runs the actions of text's productions as they are parsed, as LL1.eval(text, build_tree=False).
+
+    :param text:
+    :param actions:
+    :param start: name of the start rule, START if None
+    :param file:
+    :param lexer_actions:
+    :raise ParserError:
+        When text is nested deeper than the recursion limit allows
+    :return:
+    """
+
+    fn = _rule(start)[1]
+    file = str(type(text)) if file is None else str(file)
+    lx = _Tokens(text, file, {} if lexer_actions is None else lexer_actions)
+    try:
+        return fn(lx, {} if actions is None else actions)
+    except RecursionError:
+        raise _too_deep(lx) from None
+'''
+
+    def __init__(self, lexer: Lexer, cfg: CFG, parser: Optional[LL1] = None):
+        """
+
+        :raise ValueError:
+            When a token type or terminal can't be written as a Python literal
+
+        :param lexer:
+        :param cfg:
+        :param parser: LL1 parser of lexer and cfg, built if None
+        """
+
+        self.lexer = lexer
+        self.cfg = cfg
+        self.parser = LL1(lexer, cfg) if parser is None else parser
+        self.table = self.parser.table
+        # Whether the scanner has a master pattern for the module to match with directly
+        self.inline = MasterScanner(lexer._tokens).master is not None
+        for symbol in list(lexer.tokens) + self.table.terms:
+            self.literal(symbol)
+
+    @staticmethod
+    def literal(value: Hashable) -> str:
+        """
+
+        :param value:
+        :return: Python literal of value
+        """
+
+        text = repr(value)
+        try:
+            if literal_eval(text) == value:
+                return text
+        except (ValueError, SyntaxError):
+            pass
+        raise ValueError("{} has no Python literal".format(text))
+
+    @staticmethod
+    def tuple(items: List[str]) -> str:
+        """
+
+        :param items: sources of the items
+        :return: source of a tuple of the items
+        """
+
+        return "({})".format(items[0] + "," if len(items) == 1 else ", ".join(items))
+
+    def item(self, item: Union[str, CFG.NonTerm, None]) -> str:
+        """
+
+        :param item:
+        :return: source of a production item
+        """
+
+        if isinstance(item, CFG.NonTerm):
+            return "CFG.NonTerm({})".format(self.literal(item.name))
+        return self.literal(item)
+
+    def scanner(self) -> List[str]:
+        """
+
+        :return: lines setting ttype and end from the text at pos, indented for _Tokens.advance()
+        """
+
+        lines = ["            ttype, end = _SCANNER.match(text, pos)",
+                 "            if ttype is None:",
+                 "                ttype, end = Lexer.UNK, pos + 1"]
+        if not self.inline:
+            return lines
+        # Inlines the master match of the tokens it settles
+        return ["            match = _MATCH(text, pos)",
+                "            ttype = _FINAL.get(match.lastindex) if match is not None else None",
+                "            if ttype is not None:",
+                "                end = match.end()",
+                "            else:"] + ["    " + line for line in lines]
+
+    def tables(self) -> List[str]:
+        """
+
+        :return: lines of the module constants
+        """
+
+        lines = ["", "PRODS = ["]
+        for prod in self.table.prods:
+            items = ", ".join(self.item(i) for i in prod.prod)
+            lines += ["    CFG.Prod({}, [{}], {}),".format(self.item(prod.rule), items, prod.idx)]
+        lines += ["]",
+                  "START = {}".format(self.literal(self.cfg.start)),
+                  "_TERMS = frozenset({{{}}})".format(", ".join(self.literal(t) for t in self.table.terms)),
+                  "_SCANNER = MasterScanner({{{}}})".format(", ".join(
+                      "{}: re.compile({}, {})".format(self.literal(t), self.literal(r.pattern), int(r.flags))
+                      for t, r in self.lexer._tokens.items()))]
+        if self.inline:
+            lines += ["_MATCH = _SCANNER.master.match", "_FINAL = _SCANNER.final"]
+        return lines
+
+    def dispatch(self, rule: CFG.NonTerm) -> List[Tuple[CFG.Prod, List[Hashable]]]:
+        """
+
+        :param rule:
+        :return: productions of rule with the lookahead token types selecting them
+        """
+
+        select: Dict[int, List[Hashable]] = {}
+        for sym, prod in self.parser.lltable[rule].items():
+            select.setdefault(prod.idx, []).append(sym)
+        return [(self.table.prods[idx], sorted(syms, key=str)) for idx, syms in sorted(select.items())]
+
+    def function(self, rule: CFG.NonTerm, evaluate: bool) -> List[str]:
+        """
+
+        :param rule:
+        :param evaluate: write the evaluating function instead of the AST building one
+        :return: lines of the function parsing rule
+        """
+
+        code = self.table.rule_ids[rule] - self.table.nterms
+        choices = self.dispatch(rule)
+        loop = any(p and isinstance(p.prod[-1], CFG.NonTerm) and p.prod[-1] == rule for p, _ in choices)
+        if evaluate:
+            lines = ["", "", "def _e_{}(lx: _Tokens, actions):".format(code)]
+        else:
+            lines = ["", "", "def _p_{}(lx: _Tokens, parent: AST, actions):".format(code)]
+        lines += ["    # {}".format(rule.name)]
+        ind = "    "
+        if loop:
+            lines += ["    opened = []", "    while True:"]
+            ind = "        "
+        lines += [ind + "tok = lx.tok", ind + "t = tok.type"]
+        for n, (prod, syms) in enumerate(choices):
+            test = "t == {}".format(self.literal(syms[0])) if len(syms) == 1 else \
+                "t in _S_{}".format(prod.idx)
+            lines += [ind + ("if " if n == 0 else "elif ") + test + ":"]
+            body = ind + "    "
+            make = "AST.make(PRODS[{}], tok.line, tok.col, tok.file, tok.start, tok.start, lx.text, actions=actions" \
+                .format(prod.idx)
+            if evaluate:
+                lines += [body + "vals = [{})]".format(make)]
+            else:
+                lines += [body + "node = {}, parent=parent)".format(make)]
+            items = list(prod.prod) if prod else []
+            tail = loop and items and isinstance(items[-1], CFG.NonTerm) and items[-1] == rule
+            if tail:
+                items = items[:-1]
+            for m, item in enumerate(items):
+                if isinstance(item, CFG.NonTerm):
+                    sub = self.table.rule_ids[item] - self.table.nterms
+                    if evaluate:
+                        lines += [body + "vals.append(_e_{}(lx, actions))".format(sub)]
+                    else:
+                        lines += [body + "_p_{}(lx, node, actions)".format(sub)]
+                    continue
+                if m:
+                    # The first token was checked by the dispatch
+                    lines += [body + "tok = lx.tok",
+                              body + "if tok.type != {}:".format(self.literal(item)),
+                              body + "    _fail(tok, {})".format(self.tuple([self.literal(item)]))]
+                if evaluate:
+                    lines += [body + "vals.append(tok)"]
+                else:
+                    lines += [body + "AST.make(tok, tok.line, tok.col, tok.file, tok.start, tok.end, lx.text, "
+                                     "tok.text, parent=node)"]
+                lines += [body + "lx.last_end = tok.end", body + "lx.advance()"]
+            if tail:
+                lines += [body + "opened.append({})".format("vals" if evaluate else "node")]
+                if not evaluate:
+                    lines += [body + "parent = node"]
+                lines += [body + "continue"]
+            elif evaluate:
+                lines += [body + "value = _act(vals, lx, actions)"]
+                if loop:
+                    lines += [body + "while opened:",
+                              body + "    vals = opened.pop()",
+                              body + "    vals.append(value)",
+                              body + "    value = _act(vals, lx, actions)"]
+                lines += [body + "return value"]
+            else:
+                lines += [body + "_close(node, lx)"]
+                if loop:
+                    lines += [body + "for node in reversed(opened):", body + "    _close(node, lx)"]
+                lines += [body + "return"]
+        expected = sorted(self.parser.lltable[rule].keys(), key=str)
+        lines += [ind + "_fail(tok, {})".format(self.tuple([self.literal(s) for s in expected]))]
+        return lines
+
+    def source(self) -> str:
+        """
+
+        :return: source of the module
+        """
+
+        lines = self.HEADER.splitlines() + self.tables()
+        for rule in self.table.rules:
+            for prod, syms in self.dispatch(rule):
+                if len(syms) > 1:
+                    lines += ["_S_{} = frozenset({{{}}})".format(prod.idx, ", ".join(self.literal(s) for s in syms))]
+        lines += self.RUNTIME.replace("{scan}", "\n".join(self.scanner())).splitlines()
+        for rule in self.table.rules:
+            lines += self.function(rule, False)
+            lines += self.function(rule, True)
+        lines += ["", "", "_RULES = {"]
+        for rule in self.table.rules:
+            code = self.table.rule_ids[rule] - self.table.nterms
+            lines += ["    {}: (_p_{}, _e_{}),".format(self.literal(rule.name), code, code)]
+        lines += ["}"]
+        lines += self.API.splitlines()
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Union[str, PathLike]):
+        """
+
+        :param path: file of the module
+        :return:
+        """
+
+        with open(path, "w") as f:
+            f.write(self.source())
@@ -77,7 +77,11 @@ class UnexpToken(SyntaxError):
         :param token:
         """
 
-        super().__init__(token, "Expected token {}, found {}".format(', '.join(exp - {Lexer.EOI}), repr(token.token)))
+        exp = set(exp) - {Lexer.EOI}
+        if exp:
+            super().__init__(token, "Expected token {}, found {}".format(', '.join(exp), repr(token.token)))
+        else:
+            super().__init__(token, "Expected end of input, found {}".format(repr(token.token)))
 
 
 class UnkToken(ParserError):
@@ -93,3 +97,6 @@ class UnkToken(ParserError):
 
         super().__init__("Unknown Token: {}".format(token))
         self.token = token
+
+    def __reduce__(self):
+        return UnkToken, (self.token, )
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from array import array
+
+from parsepy.lexer import Token, TokenArray
+from parsepy.parser import CFG
+
+
+class FlatTree:
+    """
+    Parse tree stored as parallel arrays instead of one object per node.
+
+    Node n is the production prods[n], or a token when prods[n] is -1. toks[n] is the index in tokens of the token,
+    or of the lookahead token of a production. starts/ends hold source spans and parents, first_child and
+    next_sibling link the nodes, -1 meaning none. Node 0 is the root. Nodes are navigated through FlatTree.Node views.
+    """
+
+    class Node:
+        """
+        View of one node of a FlatTree, navigated like an AST.
+        """
+
+        __slots__ = ('tree', 'idx')
+
+        def __init__(self, tree: FlatTree, idx: int):
+            """
+
+            :param tree:
+            :param idx: index of the node in tree
+            """
+
+            self.tree = tree
+            self.idx = idx
+
+        @property
+        def value(self) -> Union[CFG.Prod, Token]:
+            """
+
+            :return:
+            """
+
+            prod = self.tree.prods[self.idx]
+            if prod < 0:
+                return self.tree.tokens[self.tree.toks[self.idx]]
+            return self.tree.productions[prod]
+
+        @property
+        def start(self) -> int:
+            return self.tree.starts[self.idx]
+
+        @property
+        def end(self) -> int:
+            return self.tree.ends[self.idx]
+
+        @property
+        def text(self) -> str:
+            return self.tree.source[self.start:self.end]
+
+        @property
+        def line(self) -> int:
+            return self.tree.tokens.locate(self.tree.toks[self.idx])[0]
+
+        @property
+        def col(self) -> int:
+            return self.tree.tokens.locate(self.tree.toks[self.idx])[1]
+
+        @property
+        def file(self) -> Optional[str]:
+            return self.tree.tokens.file
+
+        @property
+        def parent(self) -> Optional[FlatTree.Node]:
+            parent = self.tree.parents[self.idx]
+            return None if parent < 0 else FlatTree.Node(self.tree, parent)
+
+        @property
+        def children(self) -> List[FlatTree.Node]:
+            return list(self)
+
+        def __iter__(self) -> Iterator[FlatTree.Node]:
+            """
+
+            :return:
+            """
+
+            tree = self.tree
+            child = tree.first_child[self.idx]
+            while child >= 0:
+                yield FlatTree.Node(tree, child)
+                child = tree.next_sibling[child]
+
+        def __getitem__(self, idx: int) -> FlatTree.Node:
+            """
+
+            :param idx:
+            :return:
+            """
+
+            return self.children[idx]
+
+        def __len__(self) -> int:
+            """
+
+            :return:
+            """
+
+            return sum(1 for _ in self)
+
+        def __eq__(self, other: Any) -> bool:
+            return isinstance(other, FlatTree.Node) and self.tree is other.tree and self.idx == other.idx
+
+        def __hash__(self) -> int:
+            return hash((id(self.tree), self.idx))
+
+        def __repr__(self) -> str:
+            value = self.value
+            return "Node({})".format(repr(value) if isinstance(value, Token) else str(value))
+
+        def eval(self) -> Any:
+            """
+            Evaluates the subtree post-order with an explicit stack, calling each action once. Like AST.eval, an
+            action gets this node's view followed by its children's values, and tokens evaluate to themselves.
+
+            :return:
+            """
+
+            tree = self.tree
+            prods, first_child, next_sibling = tree.prods, tree.first_child, tree.next_sibling
+            actions = tree.actions
+            if prods[self.idx] < 0:
+                return self.value
+            frames = [[self.idx, [self], first_child[self.idx]]]
+            while True:
+                frame = frames[-1]
+                child = frame[2]
+                if child >= 0:
+                    frame[2] = next_sibling[child]
+                    if prods[child] < 0:
+                        frame[1].append(tree.tokens[tree.toks[child]])
+                    else:
+                        frames.append([child, [FlatTree.Node(tree, child)], first_child[child]])
+                    continue
+                frames.pop()
+                action = actions.get(prods[frame[0]])
+                value = action(frame[1]) if action is not None else None
+                if not frames:
+                    return value
+                frames[-1][1].append(value)
+
+    class Builder:
+        """
+        Builds a FlatTree from the events of an LL1.Driver fed the tokens of a TokenArray in order.
+        """
+
+        def __init__(self, tree: FlatTree):
+            """
+
+            :param tree:
+            """
+
+            self.tree = tree
+            self.open: List[int] = []
+            self.last: List[int] = []
+            self.count = 0
+            self.last_end = -1
+
+        def add(self, prod: int, start: int, end: int) -> int:
+            """
+
+            :param prod:
+            :param start:
+            :param end:
+            :return: index of the new node
+            """
+
+            tree = self.tree
+            idx = len(tree.prods)
+            tree.prods.append(prod)
+            tree.toks.append(self.count)
+            tree.starts.append(start)
+            tree.ends.append(end)
+            tree.first_child.append(-1)
+            tree.next_sibling.append(-1)
+            if self.open:
+                tree.parents.append(self.open[-1])
+                if self.last[-1] < 0:
+                    tree.first_child[self.open[-1]] = idx
+                else:
+                    tree.next_sibling[self.last[-1]] = idx
+                self.last[-1] = idx
+            else:
+                tree.parents.append(-1)
+            return idx
+
+        def enter(self, prod: int, token: Token):
+            """
+
+            :param prod:
+            :param token:
+            :return:
+            """
+
+            self.open.append(self.add(prod, token.start, token.start))
+            self.last.append(-1)
+
+        def shift(self, token: Token):
+            """
+
+            :param token:
+            :return:
+            """
+
+            self.add(-1, token.start, token.end)
+            self.count += 1
+            self.last_end = token.end
+
+        def exit(self, prod: int):
+            """
+
+            :param prod:
+            :return:
+            """
+
+            idx = self.open.pop()
+            self.last.pop()
+            if self.last_end > self.tree.starts[idx]:
+                self.tree.ends[idx] = self.last_end
+
+    def __init__(self, tokens: TokenArray, productions: List[CFG.Prod], actions: Dict[int, Callable]):
+        """
+
+        :param tokens: tokens of the parse
+        :param productions: productions by index
+        :param actions: actions by production index
+        """
+
+        self.tokens = tokens
+        self.source = tokens.source
+        self.productions = productions
+        self.actions = actions
+        self.prods = array('i')
+        self.toks = array('i')
+        self.starts = array(tokens.starts.typecode)
+        self.ends = array(tokens.starts.typecode)
+        self.parents = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+
+    @property
+    def root(self) -> FlatTree.Node:
+        """
+
+        :return:
+        """
+
+        return FlatTree.Node(self, 0)
+
+    def __len__(self) -> int:
+        """
+
+        :return:
+        """
+
+        return len(self.prods)
+
+    def eval(self) -> Any:
+        """
+
+        :return:
+        """
+
+        return self.root.eval()
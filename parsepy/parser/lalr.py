@@ -0,0 +1,378 @@
+from __future__ import annotations
+from typing import Dict, Callable, Optional, Hashable, Any, Iterator, Union, List, Set, Tuple, FrozenSet
+from os import PathLike
+
+from parsepy.lexer import Lexer
+from parsepy.lexer import Token, TokenArray
+from parsepy.parser import AST
+from parsepy.parser import error
+from parsepy.parser import CFG, Parser
+
+
+class LALR1(Parser):
+    """
+    LALR(1) parser driven by shift/reduce tables.
+
+    Unlike LL1, left-recursive grammars such as E -> E t_plus T | T are accepted, and give one node per production
+    used instead of the tail chains of an LL(1) grammar. ASTs, actions by production index and evaluation are the
+    same as with LL1, but tokens left over after the start rule are an error instead of being ignored.
+    """
+
+    class Table:
+        """
+        LALR(1) action and goto tables compiled to integer codes.
+
+        Terminals, EOI first, are coded from 0 and rules follow them, the last rule being the added start rule.
+        actions[state][term] is a state to shift to when >= 0, or ~production to reduce, missing for an error.
+        gotos[state][rule] is the state after reducing to rule. The added start production, numbered last, is
+        reduced when the input is accepted.
+        """
+
+        # Lookahead standing for the lookaheads of a kernel item while they are propagated
+        PROPAGATE = -1
+
+        def __init__(self, cfg: CFG, start: CFG.NonTerm):
+            """
+
+            :raise ParserError:
+                When the grammar isn't LALR(1)
+
+            :param cfg:
+            :param start: start rule
+            """
+
+            analysis = cfg.analyze()
+            self.terms: List[Hashable] = [Lexer.EOI] + sorted(analysis.terms - {Lexer.EOI}, key=str)
+            self.nterms = len(self.terms)
+            self.term_ids: Dict[Hashable, int] = {t: n for n, t in enumerate(self.terms)}
+            self.rules: List[CFG.NonTerm] = sorted(analysis.rules, key=str)
+            self.rule_ids: Dict[CFG.NonTerm, int] = {r: self.nterms + n for n, r in enumerate(self.rules)}
+            self.prods: List[CFG.Prod] = list(cfg.productions)
+            self.accept = len(self.prods)
+            self.lhs: List[int] = [self.rule_ids[p.rule] for p in self.prods] + [self.nterms + len(self.rules)]
+            self.rhs: List[Tuple[int, ...]] = [tuple(self.code(i) for i in p) if p else () for p in self.prods]
+            self.rhs += [(self.rule_ids[start], )]
+
+            self.by_rule: Dict[int, List[int]] = {}
+            for prod, rule in enumerate(self.lhs):
+                self.by_rule.setdefault(rule, []).append(prod)
+            self.nullable: Set[int] = {self.rule_ids[r] for r in analysis.nullable}
+            self.first: Dict[int, Set[int]] = {self.rule_ids[r]: {self.term_ids[t] for t in f}
+                                               for r, f in analysis.first.items()}
+
+            kernels, transitions = self.lr0()
+            lookaheads = self.lookaheads(kernels, transitions)
+            self.actions: List[Dict[int, int]] = []
+            self.gotos: List[Dict[int, int]] = []
+            for state, kernel in enumerate(kernels):
+                actions, gotos = {}, {}
+                for symbol, target in transitions[state].items():
+                    if symbol < self.nterms:
+                        actions[symbol] = target
+                    else:
+                        gotos[symbol] = target
+                items = [(prod, dot, la) for prod, dot in kernel for la in lookaheads[(state, prod, dot)]]
+                for prod, dot, la in self.closure(items):
+                    if dot < len(self.rhs[prod]):
+                        continue
+                    if la in actions and actions[la] != ~prod:
+                        raise error.ParserError(self.conflict(prod, actions[la], la))
+                    actions[la] = ~prod
+                self.actions += [actions]
+                self.gotos += [gotos]
+
+        def code(self, symbol: Union[str, CFG.NonTerm]) -> int:
+            """
+
+            :param symbol:
+            :return:
+            """
+
+            if isinstance(symbol, CFG.NonTerm):
+                return self.rule_ids[symbol]
+            return self.term_ids[symbol]
+
+        def conflict(self, prod: int, other: int, term: int) -> str:
+            """
+
+            :param prod: production to reduce
+            :param other: action already in the table
+            :param term: lookahead
+            :return: message of the conflict
+            """
+
+            kind = "Shift/reduce" if other >= 0 else "Reduce/reduce"
+            prods = [prod] + ([~other] if other < 0 else [])
+            return "{} conflict on {} reducing {}".format(kind, self.terms[term], ' and '.join(map(self.name, prods)))
+
+        def name(self, prod: int) -> str:
+            """
+
+            :param prod:
+            :return: text of the production, the added start production being written start' -> start
+            """
+
+            if prod == self.accept:
+                return "{0}' -> {0}".format(self.rules[self.rhs[prod][0] - self.nterms])
+            return str(self.prods[prod])
+
+        def seq_first(self, items: Tuple[int, ...], la: int) -> Set[int]:
+            """
+
+            :param items: symbol codes
+            :param la: lookahead following items
+            :return: the terminals that can start items followed by la
+            """
+
+            out = set()
+            for item in items:
+                if item < self.nterms:
+                    out.add(item)
+                    return out
+                out |= self.first[item]
+                if item not in self.nullable:
+                    return out
+            out.add(la)
+            return out
+
+        def closure(self, items: List[Tuple[int, int, int]]) -> Set[Tuple[int, int, int]]:
+            """
+            LR(1) closure.
+
+            :param items: (production, dot, lookahead) items
+            :return:
+            """
+
+            out = set(items)
+            work = list(out)
+            while work:
+                prod, dot, la = work.pop()
+                rhs = self.rhs[prod]
+                if dot == len(rhs) or rhs[dot] < self.nterms:
+                    continue
+                for follow in self.seq_first(rhs[dot + 1:], la):
+                    for sub in self.by_rule[rhs[dot]]:
+                        item = (sub, 0, follow)
+                        if item not in out:
+                            out.add(item)
+                            work.append(item)
+            return out
+
+        def lr0(self) -> Tuple[List[FrozenSet[Tuple[int, int]]], List[Dict[int, int]]]:
+            """
+            Canonical collection of LR(0) item sets.
+
+            :return: (kernel items of each state, transitions of each state by symbol)
+            """
+
+            kernels = [frozenset([(self.accept, 0)])]
+            states = {kernels[0]: 0}
+            transitions: List[Dict[int, int]] = []
+            n = 0
+            while n < len(kernels):
+                closure = set(kernels[n])
+                work = list(closure)
+                while work:
+                    prod, dot = work.pop()
+                    rhs = self.rhs[prod]
+                    if dot < len(rhs) and rhs[dot] >= self.nterms:
+                        for sub in self.by_rule[rhs[dot]]:
+                            if (sub, 0) not in closure:
+                                closure.add((sub, 0))
+                                work.append((sub, 0))
+                moves: Dict[int, Set[Tuple[int, int]]] = {}
+                for prod, dot in closure:
+                    if dot < len(self.rhs[prod]):
+                        moves.setdefault(self.rhs[prod][dot], set()).add((prod, dot + 1))
+                transitions += [{}]
+                for symbol, kernel in sorted(moves.items()):
+                    kernel = frozenset(kernel)
+                    if kernel not in states:
+                        states[kernel] = len(kernels)
+                        kernels += [kernel]
+                    transitions[n][symbol] = states[kernel]
+                n += 1
+            return kernels, transitions
+
+        def lookaheads(self, kernels: List[FrozenSet[Tuple[int, int]]],
+                       transitions: List[Dict[int, int]]) -> Dict[Tuple[int, int, int], Set[int]]:
+            """
+            Lookaheads of the kernel items, generated spontaneously or propagated between states.
+
+            :param kernels:
+            :param transitions:
+            :return: lookaheads by (state, production, dot)
+            """
+
+            lookaheads = {(state, prod, dot): set() for state, kernel in enumerate(kernels) for prod, dot in kernel}
+            lookaheads[(0, self.accept, 0)].add(self.term_ids[Lexer.EOI])
+            links: Dict[Tuple[int, int, int], List[Tuple[int, int, int]]] = {}
+            for state, kernel in enumerate(kernels):
+                for prod, dot in kernel:
+                    source = (state, prod, dot)
+                    for sub, sub_dot, la in self.closure([(prod, dot, LALR1.Table.PROPAGATE)]):
+                        rhs = self.rhs[sub]
+                        if sub_dot == len(rhs):
+                            continue
+                        target = (transitions[state][rhs[sub_dot]], sub, sub_dot + 1)
+                        if la == LALR1.Table.PROPAGATE:
+                            links.setdefault(source, []).append(target)
+                        else:
+                            lookaheads[target].add(la)
+            changed = True
+            while changed:
+                changed = False
+                for source, targets in links.items():
+                    for target in targets:
+                        size = len(lookaheads[target])
+                        lookaheads[target] |= lookaheads[source]
+                        changed |= size != len(lookaheads[target])
+            return lookaheads
+
+        def expected(self, state: int) -> Set[Hashable]:
+            """
+
+            :param state:
+            :return: the terminals with an action in state
+            """
+
+            return {self.terms[term] for term in self.actions[state]}
+
+    def __init__(self, lexer: Lexer, cfg: CFG, actions: Dict[int, Callable] = {}):
+        """
+
+        :raise ParserError:
+            When the grammar isn't LALR(1)
+
+        :param lexer:
+        :param cfg:
+        :param actions:
+        """
+
+        super().__init__(lexer, cfg, actions)
+        self.tables: Dict[CFG.NonTerm, LALR1.Table] = {}
+        self.table = self.start_table()
+
+    def start_table(self, start: Optional[Hashable] = None) -> LALR1.Table:
+        """
+        Tables for a start rule, built the first time they are used.
+
+        :param start: name of the start rule, the CFG's start if None
+        :return:
+        """
+
+        if start is None or isinstance(start, Hashable):
+            start = CFG.NonTerm(self.cfg.start if start is None else start)
+        else:
+            raise ValueError("start must be None or Hashable, found {}".format(start.__class__))
+        if start not in self.cfg.rules:
+            raise error.ParserError("Invalid Start Rule: {}".format(start))
+        if start not in self.tables:
+            self.tables[start] = LALR1.Table(self.cfg, start)
+        return self.tables[start]
+
+    def parse_file(self, file: Union[str, PathLike], start: Optional[Hashable] = None) -> AST:
+        with open(file, "r") as f:
+            text = f.read()
+        return self.parse(text, start, file)
+
+    def parse(self, text: Union[str, TokenArray], start: Optional[Hashable] = None,
+              file: Optional[Union[str, PathLike]] = None) -> AST:
+        """
+
+        :raise UnkToken:
+            When a token isn't used by the CFG
+        :raise UnexpToken:
+            When a token breaks the CFG
+
+        :param text: text or tokens to parse
+        :param start:
+        :param file:
+        :return:
+        """
+
+        if isinstance(text, TokenArray):
+            return self._parse(iter(text), start, text.source)
+        file = str(type(text)) if file is None else str(file)
+        return self._parse(self.lexer.tokenize(text, file), start, text)
+
+    def _parse(self, t_iter: Iterator[Token], start: Optional[Hashable] = None, source: Optional[str] = None) -> AST:
+        """
+        Shift/reduce loop with explicit state and node stacks.
+
+        :param t_iter:
+        :param start:
+        :param source:
+        :return:
+        """
+
+        table = self.start_table(start)
+        actions = self.actions
+        observer = self.observer
+        if observer is not None:
+            t_iter = observer.timed_tokens(t_iter)
+            observer.push("parse")
+        try:
+            states = [0]
+            nodes: List[AST] = []
+            for token in t_iter:
+                term = table.term_ids.get(token.type)
+                if term is None or Lexer.UNK == token.type:
+                    raise error.UnkToken(token)
+                while True:
+                    act = table.actions[states[-1]].get(term)
+                    if act is None:
+                        raise error.UnexpToken(token, table.expected(states[-1]))
+                    if act >= 0:
+                        # Shift
+                        nodes.append(AST.make(token, token.line, token.col, token.file, token.start, token.end,
+                                              source, token.text))
+                        states.append(act)
+                        break
+                    prod = ~act
+                    if prod == table.accept:
+                        return nodes[-1]
+                    if observer is not None:
+                        observer.expand(prod)
+                    # Reduce
+                    size = len(table.rhs[prod])
+                    if size:
+                        children = nodes[-size:]
+                        del nodes[-size:]
+                        del states[-size:]
+                        first = children[0]
+                        node = AST.make(table.prods[prod], first.line, first.col, first.file, first.start,
+                                        first.start, source, actions=actions)
+                        for child in children:
+                            node.add_child(child)
+                            if child.end > child.start:
+                                node.end = child.end
+                    else:
+                        node = AST.make(table.prods[prod], token.line, token.col, token.file, token.start,
+                                        token.start, source, actions=actions)
+                    nodes.append(node)
+                    states.append(table.gotos[states[-1]][table.lhs[prod]])
+        finally:
+            if observer is not None:
+                observer.pop()
+
+    def eval_file(self, path: PathLike) -> Any:
+        """
+
+        :param path:
+        :return:
+        """
+
+        tree = self.parse_file(path)
+        return tree.eval() if self.observer is None else self.observer.timed("eval", tree.eval)()
+
+    def eval(self, string: Union[str, TokenArray], file: Optional[Union[str, PathLike]] = None) -> Any:
+        """
+
+        :param string:
+        :param file:
+        :return:
+        """
+
+        tree = self.parse(string, file=file)
+        return tree.eval() if self.observer is None else self.observer.timed("eval", tree.eval)()
@@ -1,10 +1,23 @@
-from typing import Dict, Callable, Iterable, Optional, Hashable, Any, Iterator, Union
+from __future__ import annotations
 
+from typing import Dict, Callable, Iterable, Optional, Hashable, Any, Iterator, Union, IO, List, Set, Tuple, NamedTuple
+
+from array import array
+from bisect import bisect_left
+from itertools import chain
 from os import PathLike
 
+import copy
+import hashlib
+import os
+import pickle
+import sys
+
 from parsepy.lexer import Lexer
-from parsepy.lexer import Token
+from parsepy.lexer import Token, TokenArray
+from parsepy.observer import Observer
 from parsepy.parser import AST
+from parsepy.parser.flat import FlatTree
 from parsepy.parser import error
 from parsepy.parser import CFG, Parser
 
@@ -14,6 +27,719 @@ class LL1(Parser):
 
     """
 
+    CACHE_VERSION = 4
+
+    class Table:
+        """
+        LL(1) parse table compiled to integer codes.
+
+        Terminals, EOI first, are coded from 0 and rules follow them. rows[rule - nterms][term] is the index of the
+        production to expand, -1 for none. Rows are arrays, or dicts for grammars with more than DENSE cells.
+        expects[rule - nterms][term] and follows[rule - nterms][term] are 1 when term has a production in the row, or
+        is in FOLLOW of the rule, so errors and recovery test terminals by code.
+
+        Tokens are typed by whatever the lexer's patterns are keyed by, so each token still takes one term_ids lookup
+        to get its code.
+        """
+
+        DENSE = 1 << 16
+
+        class Row(dict):
+            """
+            Sparse table row.
+            """
+
+            def __missing__(self, key: int) -> int:
+                return -1
+
+        def __init__(self, cfg: CFG, lltable: Dict[CFG.NonTerm, Dict[Hashable, CFG.Prod]]):
+            """
+
+            :param cfg:
+            :param lltable: LL(1) table of cfg
+            """
+
+            analysis = cfg.analyze()
+            self.terms: List[Hashable] = [Lexer.EOI] + sorted(analysis.terms - {Lexer.EOI}, key=str)
+            self.nterms = len(self.terms)
+            self.term_ids: Dict[Hashable, int] = {t: n for n, t in enumerate(self.terms)}
+            self.rules: List[CFG.NonTerm] = sorted(analysis.rules, key=str)
+            self.rule_ids: Dict[CFG.NonTerm, int] = {r: self.nterms + n for n, r in enumerate(self.rules)}
+            self.prods: List[CFG.Prod] = list(cfg.productions)
+            self.lhs = array('i', (self.rule_ids[p.rule] for p in self.prods))
+            # Items of each production, coded and reversed to be pushed on a stack
+            self.rhs: List[Tuple[int, ...]] = [tuple(self.code(i) for i in reversed(p.prod)) if p else ()
+                                               for p in self.prods]
+            prod_ids = {id(p): n for n, p in enumerate(self.prods)}
+            self.rows: List[Union[array, LL1.Table.Row]] = []
+            self.expects: List[bytearray] = []
+            self.follows: List[bytearray] = []
+            dense = len(self.rules) * self.nterms <= LL1.Table.DENSE
+            for rule in self.rules:
+                row = array('i', [-1]) * self.nterms if dense else LL1.Table.Row()
+                expects = bytearray(self.nterms)
+                for sym, prod in lltable[rule].items():
+                    row[self.term_ids[sym]] = prod_ids[id(prod)]
+                    expects[self.term_ids[sym]] = 1
+                follow = bytearray(self.nterms)
+                for sym in analysis.follow[rule]:
+                    if sym in self.term_ids:
+                        follow[self.term_ids[sym]] = 1
+                self.rows += [row]
+                self.expects += [expects]
+                self.follows += [follow]
+
+        def expected(self, rule: int) -> Set[Hashable]:
+            """
+
+            :param rule: code of the rule
+            :return: the terminals with a production in the row of rule
+            """
+
+            expects = self.expects[rule - self.nterms]
+            return {term for n, term in enumerate(self.terms) if expects[n]}
+
+        def code(self, symbol: Union[str, CFG.NonTerm]) -> int:
+            """
+
+            :param symbol:
+            :return:
+            """
+
+            if isinstance(symbol, CFG.NonTerm):
+                return self.rule_ids[symbol]
+            return self.term_ids[symbol]
+
+    class Driver:
+        """
+        Table-driven LL(1) parse loop with an explicit stack.
+
+        Tokens are pushed one at a time with feed(). Expanding a production, matching a token and completing a
+        production are reported to a builder as enter(prod, token), shift(token) and exit(prod), prod being the
+        index of the production.
+        """
+
+        def __init__(self, parser: LL1, start: Optional[Hashable], builder: Any):
+            """
+
+            :param parser:
+            :param start: name of the start rule, the CFG's start if None
+            :param builder:
+            """
+
+            self.table = parser.table
+            self.builder = builder
+            self.stack: List[int] = [parser.start_code(start)]
+            if parser.observer is not None:
+                self.builder = Observer.Builder(builder, parser.observer)
+                self.feed = parser.observer.timed("parse", self.feed)
+
+        @property
+        def done(self) -> bool:
+            """
+
+            :return: True once the start rule has been derived
+            """
+
+            return not self.stack
+
+        def feed(self, token: Token) -> bool:
+            """
+            Expands the stack until token is matched.
+
+            :raise UnkToken:
+                When token isn't used by the CFG
+            :raise UnexpToken:
+                When token breaks the CFG
+
+            :param token:
+            :return: True if the start rule was derived before token, which is then not consumed
+            """
+
+            table = self.table
+            stack = self.stack
+            builder = self.builder
+            nterms = table.nterms
+            term = table.term_ids.get(token.type)
+            while stack:
+                symbol = stack.pop()
+                if symbol < 0:
+                    # End of production ~symbol
+                    builder.exit(~symbol)
+                elif term and symbol == term:
+                    # Found Token
+                    builder.shift(token)
+                    return False
+                elif term is None or Lexer.UNK == token.type:
+                    # Unknown Token
+                    stack.append(symbol)
+                    raise error.UnkToken(token)
+                elif symbol < nterms:
+                    # Unexpected Token
+                    stack.append(symbol)
+                    raise error.UnexpToken(token, {table.terms[symbol], })
+                else:
+                    prod = table.rows[symbol - nterms][term]
+                    if prod < 0:
+                        # Unexpected Token
+                        stack.append(symbol)
+                        raise error.UnexpToken(token, table.expected(symbol))
+                    # Found Production
+                    builder.enter(prod, token)
+                    stack.append(~prod)
+                    stack.extend(table.rhs[prod])
+            return True
+
+    class TreeBuilder:
+        """
+        Builds the AST of a parse from the Driver's events.
+
+        Nodes get the source span from their first to their last token, their text is sliced from it when read.
+        """
+
+        def __init__(self, parser: LL1, source: Optional[str] = None):
+            """
+
+            :param parser:
+            :param source: text being parsed, node text is joined from the children's without it
+            """
+
+            self.prods = parser.table.prods
+            self.actions = parser.actions
+            self.source = source
+            self.nodes: List[AST] = []
+            self.root: Optional[AST] = None
+            self.last_end = -1
+
+        def enter(self, prod: int, token: Token):
+            """
+
+            :param prod:
+            :param token:
+            :return:
+            """
+
+            node = AST.make(self.prods[prod], token.line, token.col, token.file, token.start, token.start,
+                            self.source, actions=self.actions)
+            if self.nodes:
+                self.nodes[-1].add_child(node)
+            else:
+                self.root = node
+            self.nodes.append(node)
+
+        def shift(self, token: Token):
+            """
+
+            :param token:
+            :return:
+            """
+
+            self.nodes[-1].add_child(AST.make(token, token.line, token.col, token.file, token.start, token.end,
+                                              self.source, token.text))
+            self.last_end = token.end
+
+        def exit(self, prod: int):
+            """
+
+            :param prod:
+            :return:
+            """
+
+            node = self.nodes.pop()
+            if self.last_end > node.start:
+                # The node holds tokens, it ends with the last one
+                node.end = self.last_end
+
+        def graft(self, node: AST):
+            """
+            Adds a complete subtree, such as one reused from an earlier parse.
+
+            :param node:
+            :return:
+            """
+
+            if self.nodes:
+                self.nodes[-1].add_child(node)
+            else:
+                # It may have been a child in the earlier tree
+                node.parent = None
+                self.root = node
+            if node.end > node.start:
+                self.last_end = node.end
+
+    class Reparser:
+        """
+        Parses an edited text, reusing the subtrees of the AST of the text before the edit.
+
+        The text is re-lexed from the last token starting lookahead characters before the edit, keeping the old
+        tokens while they come out the same, until a token starts where an old token after the edit started, from
+        where the old tokens are used. The tokens are those of the whole text as long as no pattern needs to look
+        further than lookahead characters from where its match starts. A rule expected at a token is taken whole
+        from the old tree when the tokens it spans and the lookahead after them are all before the re-lexed ones or
+        all after them, as its LL(1) derivation can't have changed. Old tokens and subtrees are found by walking the
+        old tree from the edit, and reused subtrees are moved into the new tree by AST.move(), so the work grows with
+        the edit, lookahead and the depth of the tree rather than with the text.
+        """
+
+        def __init__(self, parser: LL1, tree: AST, old_text: str, edit: Tuple[int, int, str],
+                     file: Optional[Union[str, PathLike]] = None, lookahead: int = 4096):
+            """
+
+            :param parser:
+            :param tree: AST of old_text, consumed by the reparse
+            :param old_text:
+            :param edit: (start, end, text) replacing old_text[start:end] with text
+            :param file:
+            :param lookahead: characters past its start a token pattern may need to see
+            """
+
+            start, end, inserted = edit
+            if not 0 <= start <= end <= len(old_text):
+                raise ValueError("edit must be (start, end, text) with 0 <= start <= end <= len(old_text)")
+            self.parser = parser
+            self.text = old_text[:start] + inserted + old_text[end:]
+            self.file = tree.file if file is None else str(file)
+
+            # Offset, line and column shift of the text after the edit
+            self.delta = len(inserted) - (end - start)
+            self.lines = inserted.count('\n') - old_text.count('\n', start, end)
+            self.edit_line = old_text.count('\n', 0, end) + 1
+            self.cols = (end + self.delta - self.text.rfind('\n', 0, end + self.delta)) - \
+                        (end - old_text.rfind('\n', 0, end))
+
+            # No match at a token starting lookahead characters before the edit can see it, so the text is lexed
+            # from there. Old tokens are kept while the same tokens come out before the edit, then the text is
+            # lexed until it resynchronizes with the old tokens after the edit
+            leaf = LL1.Reparser.leaf_before(tree, start - lookahead + 1)
+            t_iter = self.lex(0 if leaf is None else leaf.start)
+            if leaf is None:
+                leaf = LL1.Reparser.first_leaf(tree)
+            token = next(t_iter)
+            while leaf is not None and leaf.end <= start and LL1.Reparser.same(leaf.value, token):
+                leaf = LL1.Reparser.next_leaf(leaf)
+                token = next(t_iter)
+            # The first old token not kept, None if all are
+            self.bound = leaf
+            after = LL1.Reparser.leaf_before(tree, end)
+            after = LL1.Reparser.first_leaf(tree) if after is None else LL1.Reparser.next_leaf(after)
+            self.middle: List[Token] = []
+            self.resume: Optional[AST] = None
+            for token in chain((token,), t_iter):
+                while after is not None and after.start + self.delta < token.start:
+                    after = LL1.Reparser.next_leaf(after)
+                if after is not None and after.start + self.delta == token.start:
+                    self.resume = after
+                    break
+                self.middle.append(token)
+            # Tokens after the old tree's, lexed when the parse reaches them
+            self.tail_start = tree.end + self.delta
+
+            # The current token, before (0), in (1) or after (2) the re-lexed ones, or after the old tree (3). Before
+            # and after the re-lexed tokens, leaf is its node in the old tree
+            self.region = 0
+            self.leaf: Optional[AST] = None
+            self.token: Optional[Token] = None
+            self.k = -1
+            self.tail_iter: Optional[Iterator[Token]] = None
+            self.goto(LL1.Reparser.first_leaf(tree))
+
+        @staticmethod
+        def has_tokens(node: AST) -> bool:
+            """
+
+            :param node:
+            :return: whether node is a token or a rule that derived some
+            """
+
+            return node.end > node.start or isinstance(node.value, Token)
+
+        @staticmethod
+        def same(old: Token, new: Token) -> bool:
+            """
+
+            :param old:
+            :param new:
+            :return: whether new is old lexed again at the same place
+            """
+
+            return old.type == new.type and old.start == new.start and old.end == new.end and old.token == new.token
+
+        @staticmethod
+        def first_leaf(node: AST) -> Optional[AST]:
+            """
+
+            :param node:
+            :return: first token node of the subtree, None if it has none
+            """
+
+            while not isinstance(node.value, Token):
+                for child in node.children:
+                    if LL1.Reparser.has_tokens(child):
+                        node = child
+                        break
+                else:
+                    return None
+            return node
+
+        @staticmethod
+        def last_leaf(node: AST) -> Optional[AST]:
+            """
+
+            :param node:
+            :return: last token node of the subtree, None if it has none
+            """
+
+            while not isinstance(node.value, Token):
+                for child in reversed(node.children):
+                    if LL1.Reparser.has_tokens(child):
+                        node = child
+                        break
+                else:
+                    return None
+            return node
+
+        @staticmethod
+        def next_leaf(node: AST) -> Optional[AST]:
+            """
+
+            :param node:
+            :return: first token node after the subtree node, None if it is the last
+            """
+
+            parent = node.parent
+            while parent is not None:
+                children = parent.children
+                n = next(n for n, child in enumerate(children) if child is node)
+                for child in children[n + 1:]:
+                    leaf = LL1.Reparser.first_leaf(child)
+                    if leaf is not None:
+                        return leaf
+                node, parent = parent, parent.parent
+            return None
+
+        @staticmethod
+        def prev_leaf(node: AST) -> Optional[AST]:
+            """
+
+            :param node:
+            :return: last token node before the subtree node, None if it is the first
+            """
+
+            parent = node.parent
+            while parent is not None:
+                children = parent.children
+                n = next(n for n, child in enumerate(children) if child is node)
+                for child in reversed(children[:n]):
+                    leaf = LL1.Reparser.last_leaf(child)
+                    if leaf is not None:
+                        return leaf
+                node, parent = parent, parent.parent
+            return None
+
+        @staticmethod
+        def leaf_before(tree: AST, pos: int) -> Optional[AST]:
+            """
+            Descends from the root to the last token starting before pos, bisecting on the children's starts.
+
+            :param tree:
+            :param pos:
+            :return: its node, None if no token starts before pos
+            """
+
+            node = tree
+            while not isinstance(node.value, Token):
+                children = node.children
+                n = bisect_left([child.start for child in children], pos)
+                while n and not LL1.Reparser.has_tokens(children[n - 1]):
+                    n -= 1
+                if not n:
+                    return None
+                node = children[n - 1]
+            return node
+
+        def lex(self, pos: int) -> Iterator[Token]:
+            """
+            Lexes the new text from a token boundary.
+
+            :param pos:
+            :return:
+            """
+
+            text = self.text
+            lexer = self.parser.lexer
+            line = text.count('\n', 0, pos) + 1
+            line_start = text.rfind('\n', 0, pos) + 1
+            while pos < len(text):
+                ttype, token, chars, length = lexer.get_token(text, pos)
+                if token is not None:
+                    yield Token(ttype, token, chars, line, pos - line_start + 1, self.file, pos, pos + length)
+                lines = text.count('\n', pos, pos + length)
+                if lines:
+                    line += lines
+                    line_start = text.rfind('\n', pos, pos + length) + 1
+                pos += length
+            if text:
+                # A final newline doesn't start a line
+                last = text.rfind('\n', 0, len(text) - 1) + 1
+                yield Token(Lexer.EOI, None, '', text.count('\n', 0, len(text) - 1) + 1, len(text) - last, self.file,
+                            len(text), len(text))
+            else:
+                yield Token(Lexer.EOI, None, '', -1, -1, self.file, 0, 0)
+
+        def goto(self, leaf: Optional[AST]):
+            """
+            Makes the token of an old token node current, or the next new token once past the old tokens in use.
+
+            :param leaf: next old token node, None in the re-lexed tokens or after the last old token
+            :return:
+            """
+
+            if self.region == 0:
+                if leaf is not None and leaf is not self.bound:
+                    self.leaf, self.token = leaf, leaf.value
+                    return
+                self.region = 1
+            if self.region == 1:
+                self.k += 1
+                if self.k < len(self.middle):
+                    self.leaf, self.token = None, self.middle[self.k]
+                    return
+                self.region = 2
+                leaf = self.resume
+            if self.region == 2:
+                if leaf is not None:
+                    old = leaf.value
+                    line, col = self.locate(old.line, old.col)
+                    self.leaf = leaf
+                    self.token = Token(old.type, old.token, old.text, line, col, self.file, old.start + self.delta,
+                                       old.end + self.delta)
+                    return
+                self.region = 3
+                self.tail_iter = self.lex(self.tail_start)
+            self.leaf, self.token = None, next(self.tail_iter)
+
+        def shift(self):
+            """
+            Moves past the current token.
+
+            :return:
+            """
+
+            self.goto(None if self.leaf is None else LL1.Reparser.next_leaf(self.leaf))
+
+        def locate(self, line: int, col: int) -> Tuple[int, int]:
+            """
+            Line and column after the edit of a position after it.
+
+            :param line:
+            :param col:
+            :return:
+            """
+
+            return line + self.lines, col + self.cols if line == self.edit_line else col
+
+        def reuse(self, rule: CFG.NonTerm) -> Optional[AST]:
+            """
+            Takes the old subtree of rule at the current token if its derivation is unchanged, and moves past it.
+
+            :param rule:
+            :return: the subtree moved to the new text, or None
+            """
+
+            leaf = self.leaf
+            if leaf is None:
+                return None
+            # The rules starting at the token are its ancestors starting at it
+            node = leaf
+            while True:
+                parent = node.parent
+                if parent is None or parent.start != leaf.start:
+                    return None
+                node = parent
+                if node.value.rule == rule:
+                    break
+            bound = self.bound
+            if self.region == 0 and bound is not None and node.end >= bound.start:
+                # Its tokens are lexed again
+                return None
+            after = LL1.Reparser.next_leaf(node)
+            if self.region == 0:
+                if after is None or bound is not None and after.start >= bound.start:
+                    # Its lookahead is lexed again
+                    return None
+                node.move(self.text, self.file)
+            else:
+                node.move(self.text, self.file, self.delta, self.lines, self.edit_line, self.cols)
+            self.goto(after)
+            return node
+
+        def parse(self, start: Optional[Hashable] = None) -> AST:
+            """
+
+            :raise UnkToken:
+                When a token isn't used by the CFG
+            :raise UnexpToken:
+                When a token breaks the CFG
+
+            :param start:
+            :return:
+            """
+
+            parser = self.parser
+            table = parser.table
+            nterms = table.nterms
+            builder = LL1.TreeBuilder(parser, self.text)
+            stack = [parser.start_code(start)]
+            token = self.token
+            term = table.term_ids.get(token.type)
+            while stack:
+                symbol = stack.pop()
+                if symbol < 0:
+                    builder.exit(~symbol)
+                elif term and symbol == term:
+                    builder.shift(token)
+                    self.shift()
+                    token = self.token
+                    term = table.term_ids.get(token.type)
+                elif term is None or Lexer.UNK == token.type:
+                    raise error.UnkToken(token)
+                elif symbol < nterms:
+                    raise error.UnexpToken(token, {table.terms[symbol], })
+                else:
+                    node = self.reuse(table.rules[symbol - nterms])
+                    if node is not None:
+                        builder.graft(node)
+                        token = self.token
+                        term = table.term_ids.get(token.type)
+                        continue
+                    prod = table.rows[symbol - nterms][term]
+                    if prod < 0:
+                        raise error.UnexpToken(token, table.expected(symbol))
+                    builder.enter(prod, token)
+                    stack.append(~prod)
+                    stack.extend(table.rhs[prod])
+            return builder.root
+
+    class EvalBuilder:
+        """
+        Runs the actions of productions as the Driver completes them, without keeping a tree.
+
+        An action gets the same vals as from AST.eval: vals[0] is a childless AST of the production, whose text is
+        sliced from the source when read, followed by the Tokens and values of its children. Only the vals of the
+        productions being parsed are held.
+        """
+
+        def __init__(self, parser: LL1, source: Optional[str] = None):
+            """
+
+            :param parser:
+            :param source: text being parsed
+            """
+
+            self.prods = parser.table.prods
+            self.actions = parser.actions
+            self.source = source
+            self.frames: List[List[Any]] = []
+            self.value: Any = None
+            self.last_end = -1
+
+        def enter(self, prod: int, token: Token):
+            """
+
+            :param prod:
+            :param token:
+            :return:
+            """
+
+            self.frames.append([AST.make(self.prods[prod], token.line, token.col, token.file, token.start,
+                                         token.start, self.source, actions=self.actions)])
+
+        def shift(self, token: Token):
+            """
+
+            :param token:
+            :return:
+            """
+
+            self.frames[-1].append(token)
+            self.last_end = token.end
+
+        def exit(self, prod: int):
+            """
+
+            :param prod:
+            :return:
+            """
+
+            vals = self.frames.pop()
+            if self.last_end > vals[0].start:
+                vals[0].end = self.last_end
+            action = self.actions.get(prod)
+            value = action(vals) if action is not None else None
+            if self.frames:
+                self.frames[-1].append(value)
+            else:
+                self.value = value
+
+    class Event(NamedTuple):
+        """
+        Step of a derivation reported by LL1.events().
+
+        kind is ENTER when production prod is expanded on lookahead token, TOKEN when token is matched and EXIT when
+        production prod is complete. start and end are the source span, which for ENTER is empty at the lookahead.
+        """
+
+        ENTER = "enter"
+        TOKEN = "token"
+        EXIT = "exit"
+
+        kind: str
+        prod: int
+        token: Optional[Token]
+        start: int
+        end: int
+
+    class EventBuilder:
+        """
+        Queues the Driver's events as LL1.Events.
+        """
+
+        def __init__(self):
+            self.events: List[LL1.Event] = []
+            self.starts: List[int] = []
+            self.last_end = -1
+
+        def enter(self, prod: int, token: Token):
+            """
+
+            :param prod:
+            :param token:
+            :return:
+            """
+
+            self.starts.append(token.start)
+            self.events.append(LL1.Event(LL1.Event.ENTER, prod, token, token.start, token.start))
+
+        def shift(self, token: Token):
+            """
+
+            :param token:
+            :return:
+            """
+
+            self.events.append(LL1.Event(LL1.Event.TOKEN, -1, token, token.start, token.end))
+            self.last_end = token.end
+
+        def exit(self, prod: int):
+            """
+
+            :param prod:
+            :return:
+            """
+
+            start = self.starts.pop()
+            self.events.append(LL1.Event(LL1.Event.EXIT, prod, None, start, max(start, self.last_end)))
+
     def __init__(self, lexer: Lexer, cfg: CFG, actions: Dict[int, Callable] = {}):
         """
 
@@ -31,103 +757,315 @@ class LL1(Parser):
                     self.lltable[prod.rule][sym] = prod
                 else:
                     raise error.ParserError("Ambiguous Grammar in rule {}".format(prod.rule))
+        self.table = LL1.Table(cfg, self.lltable)
+
+    @classmethod
+    def cached(cls, path: Union[str, PathLike], tokens: Dict[Hashable, str], grammar: str,
+               actions: Optional[Dict[int, Callable]] = None,
+               lexer_actions: Optional[Dict[Hashable, Callable[[str], Any]]] = None, engine: str = "master") -> LL1:
+        """
+        Builds a parser from token patterns and a CFG string, loading the compiled lexer, CFG and tables from a
+        cache file when it was written for the same definitions. Otherwise the parser is built and the cache file
+        written. Actions are never cached and are given on every call.
+
+        :param path: cache file
+        :param tokens: token patterns, as for Lexer
+        :param grammar: CFG string, as for CFG.parse
+        :param actions: parser actions
+        :param lexer_actions: lexer actions
+        :param engine: lexer engine
+        :return:
+        """
+
+        actions = {} if actions is None else actions
+        lexer_actions = {} if lexer_actions is None else lexer_actions
+        key = hashlib.sha256(repr((cls.__qualname__, sys.version_info[:2], list(tokens.items()), grammar,
+                                   engine)).encode('utf-8')).hexdigest()
+        try:
+            with open(path, "rb") as f:
+                version, found, parser = pickle.load(f)
+            if version == LL1.CACHE_VERSION and found == key and isinstance(parser, cls):
+                parser.actions = actions
+                parser.lexer.actions = lexer_actions
+                return parser
+        except Exception:
+            # Missing, stale or unreadable cache, a corrupt pickle can raise about anything
+            pass
+
+        parser = cls(Lexer(tokens, lexer_actions, engine), CFG.parse(grammar), actions)
+        state = copy.copy(parser)
+        state.actions = {}
+        state.lexer = copy.copy(parser.lexer)
+        state.lexer.actions = {}
+        tmp = "{}.{}.tmp".format(os.fspath(path), os.getpid())
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump((LL1.CACHE_VERSION, key, state), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            # The parser still works without a cache
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return parser
 
     def parse_file(self, file: Union[str, PathLike], start: Optional[Hashable] = None):
         with open(file, "r") as f:
             text = f.read()
         return self.parse(text, start, file)
 
-    def parse(self, text: str, start: Optional[Hashable] = None, file: Optional[Union[str, PathLike]] = None) -> AST:
-        if start is None or isinstance(start, Hashable):
-            start = CFG.NonTerm(self.cfg.start if start is None else start)
+    def parse(self, text: Union[str, TokenArray], start: Optional[Hashable] = None,
+              file: Optional[Union[str, PathLike]] = None) -> AST:
+        if isinstance(text, TokenArray):
+            return self._parse(iter(text), start, text.source)
+        file = str(type(text)) if file is None else str(file)
+        return self._parse(self.lexer.tokenize(text, file), start, text)
+
+    def parse_stream(self, stream: Union[IO, Iterable[Union[str, bytes]]], start: Optional[Hashable] = None,
+                     file: Optional[Union[str, PathLike]] = None) -> AST:
+        """
+        Parses a file object or an iterator of chunks without reading it whole.
+
+        The text is not kept, so node text is joined from the tokens and leaves out skipped ones such as whitespace.
+
+        :param stream: text or binary file object, or iterable of str or bytes chunks
+        :param start:
+        :param file:
+        :return:
+        """
+
+        return self._parse(self.get_tokens_from_stream(stream, file), start)
+
+    async def parse_async(self, reader: Any, start: Optional[Hashable] = None,
+                          file: Optional[Union[str, PathLike]] = None) -> AST:
+        """
+        Parses an asyncio.StreamReader as its data arrives, awaiting it only when the lexer needs more input.
+
+        As with parse_stream(), node text is joined from the tokens and leaves out skipped ones.
+
+        :param reader: object with a coroutine read(n) giving str or bytes, empty at the end of input
+        :param start:
+        :param file:
+        :return:
+        """
+
+        builder = LL1.TreeBuilder(self)
+        driver = LL1.Driver(self, start, builder)
+        async for token in self.lexer.tokenize_async(reader, "" if file is None else file):
+            if driver.feed(token):
+                break
+        return builder.root
+
+    def parse_recover(self, text: Union[str, TokenArray], start: Optional[Hashable] = None,
+                      file: Optional[Union[str, PathLike]] = None) -> Tuple[Optional[AST], List[error.ParserError]]:
+        """
+        Parses text in one pass, recovering from syntax errors instead of raising the first one.
+
+        Recovery is panic mode: an unknown token is skipped, an expected terminal is taken as missing, and an
+        expected rule is given up when the token is in its FOLLOW set, or the token is skipped otherwise. The start
+        rule is only given up at the end of input. Errors are not reported again until a token has been matched, so
+        one mistake gives one error. Tokens left once the start rule is derived give one more error and are skipped,
+        unless the first of them was already reported.
+
+        :param text: text or tokens to parse
+        :param start:
+        :param file:
+        :return: (AST of what could be parsed, None if nothing could, errors in the order found)
+        """
+
+        if isinstance(text, TokenArray):
+            t_iter, source = iter(text), text.source
         else:
-            raise ValueError("start must be None or Hashable, found {}".format(start.__class__))
-        if file is None:
-            file = str(type(text))
-        t_iter = self.lexer.tokenize(text)
-        ast, _ = self._r_parse(next(t_iter), t_iter, start)
-        return ast
+            t_iter, source = self.lexer.tokenize(text, str(type(text)) if file is None else str(file)), text
+        if self.observer is not None:
+            t_iter = self.observer.timed_tokens(t_iter)
+        table = self.table
+        follows = table.follows
+        builder = LL1.TreeBuilder(self, source)
+        driver = LL1.Driver(self, start, builder)
+        stack = driver.stack
+        errors: List[error.ParserError] = []
+        panic = done = False
+        for token in t_iter:
+            while True:
+                try:
+                    done = driver.feed(token)
+                except error.UnkToken as err:
+                    if not panic:
+                        errors.append(err)
+                    panic = True
+                    done = False
+                    break
+                except error.UnexpToken as err:
+                    if not panic:
+                        errors.append(err)
+                    panic = True
+                    symbol = stack[-1]
+                    if token.type == Lexer.EOI or (len(stack) > 1 and (
+                            symbol < table.nterms or follows[symbol - table.nterms][table.term_ids[token.type]])):
+                        # Go on without the symbol
+                        stack.pop()
+                        continue
+                    # Skip the token
+                    done = False
+                    break
+                # The token was matched unless the start rule was derived before it
+                panic = panic and done
+                break
+            if done:
+                break
+        if done and token.type != Lexer.EOI:
+            # Tokens left after the start rule was derived, already reported if it was given up at the token
+            if not panic:
+                errors.append(error.UnexpToken(token, {Lexer.EOI, }))
+            for token in t_iter:
+                pass
+        return builder.root, errors
+
+    def reparse(self, tree: AST, old_text: str, edit: Tuple[int, int, str], start: Optional[Hashable] = None,
+                file: Optional[Union[str, PathLike]] = None, lookahead: int = 4096) -> AST:
+        """
+        Parses old_text after an edit, re-lexing around the edit and reusing the subtrees of tree it can't have
+        changed. tree is taken apart to build the new AST and should not be used afterwards.
 
-    def _r_parse(self, token: Token, token_iter: Lexer.Iter, symbol: Union[str, CFG.NonTerm]):
+        :param tree: AST of old_text
+        :param old_text: text tree was parsed from
+        :param edit: (start, end, text) replacing old_text[start:end] with text
+        :param start:
+        :param file:
+        :param lookahead: characters past its start a token pattern may need to see, the text is re-lexed from that
+            far before the edit: the AST is only guaranteed to be that of parse() when no pattern needs to see further
+        :return: AST of the edited text
+        """
+
+        return LL1.Reparser(self, tree, old_text, edit, file, lookahead).parse(start)
+
+    def parse_flat(self, text: Union[str, TokenArray], start: Optional[Hashable] = None,
+                   file: Optional[Union[str, PathLike]] = None) -> FlatTree:
+        """
+        Parses into a FlatTree, which keeps nodes in arrays instead of AST objects.
+
+        :param text: text or tokens to parse
+        :param start:
+        :param file:
+        :return:
         """
+
+        if not isinstance(text, TokenArray):
+            text = self.lexer.tokenize_array(text, str(type(text)) if file is None else str(file))
+        tree = FlatTree(text, self.table.prods, self.actions)
+        self._drive(iter(text), start, FlatTree.Builder(tree))
+        return tree
+
+    def events(self, text: Union[str, TokenArray], start: Optional[Hashable] = None,
+               file: Optional[Union[str, PathLike]] = None) -> Iterator[LL1.Event]:
+        """
+        Parses text lazily, yielding the steps of the derivation instead of building an AST. Only the open
+        productions are held, and closing the generator stops lexing and parsing. On a syntax error, the steps taken
+        for the token are yielded before the error is raised.
+
         :raise UnkToken:
-            When token isn't used by the CFG
+            When a token isn't used by the CFG
         :raise UnexpToken:
-            When token breaks the CFG at symbol
-
-        :param token: Token
-            current token in parse
-        :param token_iter: Lexer.Iter
-            Token Iterator for the parse
-        :param symbol: Union[str, CFG.NonTerm
-            current Symbol in LL1 Table parse
-
-        :return: AST
-            An abstract syntax tree of symbol with token_iter
-        """
-
-        if Lexer.EOI != token.type and symbol == token.type:
-            # Found Token
-            ast = AST(token, token.text, None, token.line, token.col, token.file)
-            # Get next Token
-            token = next(token_iter)
-        elif Lexer.EOI != token.type not in self.cfg.terms or Lexer.UNK == token.type:
-            # Unknown Token
-            raise error.UnkToken(token)
-        elif symbol in self.cfg.terms:
-            # Unexpected Token
-            raise error.UnexpToken(token, {symbol, })
-        elif token.type not in self.lltable[symbol]:
-            # Unexpected Token
-            raise error.UnexpToken(token, set(self.lltable[symbol].keys()))
+            When a token breaks the CFG
+
+        :param text: text or tokens to parse
+        :param start:
+        :param file:
+        :return: LL1.Events in derivation order
+        """
+
+        if isinstance(text, TokenArray):
+            t_iter = iter(text)
         else:
-            prod = self.lltable[symbol][token.type]
-            # Found Production
+            t_iter = self.lexer.tokenize(text, str(type(text)) if file is None else str(file))
+        builder = LL1.EventBuilder()
+        driver = LL1.Driver(self, start, builder)
+        events = builder.events
+        if self.observer is not None:
+            t_iter = self.observer.timed_tokens(t_iter)
+        for token in t_iter:
             try:
-                act = self.actions[prod.idx]
-            except KeyError:
-                act = None
-            ast = AST(prod, '', act, token.line, token.col, token.file)
-
-            if len(prod):
-                # Iterate through items in Production
-                for symbol in prod:
-                    # Recurse
-                    child_ast, token = self._r_parse(token, token_iter, symbol)
-                    ast.add_child(child_ast)
-                st_tok = ast.children[0]
-                en_tok = ast.children[-1]
-                st_line = st_tok.line
-                st_col = st_tok.col
-                en_line = en_tok.line + en_tok.text.count('\n')
-                en_col = en_tok.col + len(en_tok.text) if en_tok.text.count('\n') == 0 else len(en_tok.text) - en_tok.text.rindex('\n')
-                raw = token_iter.str_in.splitlines()[st_line-1:en_line]
-                raw[0] = raw[0][st_col-1:]
-                raw[-1] = raw[-1][:en_col-st_col]
-                ast.text = ''.join(raw)
-            else:
-                # Found epsilon production
-                pass
-        return ast, token
+                done = driver.feed(token)
+            except error.ParserError:
+                # Steps taken before the error come first
+                yield from events
+                raise
+            yield from events
+            events.clear()
+            if done:
+                break
+
+    def _parse(self, t_iter: Iterator[Token], start: Optional[Hashable] = None, source: Optional[str] = None) -> AST:
+        return self._drive(t_iter, start, LL1.TreeBuilder(self, source)).root
+
+    def _drive(self, t_iter: Iterator[Token], start: Optional[Hashable], builder: Any) -> Any:
+        """
+        Feeds tokens to a Driver until the start rule is derived.
+
+        :param t_iter:
+        :param start:
+        :param builder:
+        :return: builder
+        """
+
+        driver = LL1.Driver(self, start, builder)
+        if self.observer is not None:
+            t_iter = self.observer.timed_tokens(t_iter)
+        for token in t_iter:
+            if driver.feed(token):
+                break
+        return builder
 
-    def eval_file(self, path: PathLike) -> Any:
+    def start_code(self, start: Optional[Hashable] = None) -> int:
+        """
+        Code of the start rule in the compiled table.
+
+        :param start: name of the start rule, the CFG's start if None
+        :return:
+        """
+
+        if start is None or isinstance(start, Hashable):
+            start = CFG.NonTerm(self.cfg.start if start is None else start)
+        else:
+            raise ValueError("start must be None or Hashable, found {}".format(start.__class__))
+        if start not in self.table.rule_ids:
+            raise error.ParserError("Invalid Start Rule: {}".format(start))
+        return self.table.rule_ids[start]
+
+    def eval_file(self, path: PathLike, build_tree: bool = True) -> Any:
         """
 
 
         :param path:
+        :param build_tree: evaluate the AST of the file, else run the actions during the parse without one
         :return:
         """
 
-        return self.parse_file(path).eval()
+        if build_tree:
+            tree = self.parse_file(path)
+            return tree.eval() if self.observer is None else self.observer.timed("eval", tree.eval)()
+        with open(path, "r") as f:
+            text = f.read()
+        return self.eval(text, build_tree, path)
 
-    def eval(self, string: Iterable) -> Any:
+    def eval(self, string: Iterable, build_tree: bool = True, file: Optional[Union[str, PathLike]] = None) -> Any:
         """
 
         :param string:
+        :param build_tree: evaluate the AST of string, else run the actions during the parse without one
+        :param file:
         :return:
         """
 
-        return self.parse(string).eval()
+        if build_tree:
+            tree = self.parse(string, file=file)
+            return tree.eval() if self.observer is None else self.observer.timed("eval", tree.eval)()
+        if isinstance(string, TokenArray):
+            return self._drive(iter(string), None, LL1.EvalBuilder(self, string.source)).value
+        file = str(type(string)) if file is None else str(file)
+        return self._drive(self.lexer.tokenize(string, file), None, LL1.EvalBuilder(self, string)).value
 
 
 def test():
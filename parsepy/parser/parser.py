@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union, IO, NamedTuple
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from os import PathLike
 
+import pickle
+
 from parsepy.lexer import *
+from parsepy.observer import Observer
 from parsepy.parser.cfg import CFG
+from parsepy.parser.ast import AST
 from parsepy.parser import error
 
 
@@ -14,12 +19,25 @@ class Parser:
 
     """
 
-    def __init__(self, lexer: Lexer, cfg: CFG, actions: Dict[CFG.NonTerm, Callable] = {}):
+    class Result(NamedTuple):
+        """
+        Outcome of one document of Parser.parse_batch(), error being the exception it raised, if any.
+        """
+
+        index: int
+        source: Union[str, PathLike]
+        value: Any
+        error: Optional[BaseException]
+
+    # Parser of the worker processes of parse_batch()
+    _worker: Optional[Parser] = None
+
+    def __init__(self, lexer: Lexer, cfg: CFG, actions: Union[Dict[CFG.NonTerm, Callable], str] = {}):
         """
 
         :param lexer:
         :param cfg:
-        :param actions:
+        :param actions: actions, or the importable name of them, see Lexer.resolve()
         """
 
         nc = lexer.tokens & cfg.rules
@@ -33,8 +51,158 @@ class Parser:
 
         self.lexer = lexer
         self.cfg = cfg
+        self._observer = None
         self.actions = actions
 
+    @property
+    def actions(self) -> Dict[CFG.NonTerm, Callable]:
+        if self._observer is None:
+            return self._actions
+        if self._timed_actions is None:
+            self._timed_actions = self._observer.timed_actions(self._actions)
+        return self._timed_actions
+
+    @actions.setter
+    def actions(self, actions: Union[Dict[CFG.NonTerm, Callable], str]):
+        if isinstance(actions, str):
+            self._actions_name = actions
+            self._actions = Lexer.resolve(actions)
+        else:
+            self._actions_name = None
+            self._actions = actions
+        self._timed_actions = None
+
+    @property
+    def observer(self) -> Optional[Observer]:
+        """
+        Observer of the parser and its lexer, None to stop observing. While it is set, actions are given wrapped to
+        time them.
+
+        :return:
+        """
+
+        return self._observer
+
+    @observer.setter
+    def observer(self, observer: Optional[Observer]):
+        self._observer = observer
+        self._timed_actions = None
+        self.lexer.observer = observer
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Pickled state without the observer, actions given by name are imported again when loaded.
+
+        :return:
+        """
+
+        state = self.__dict__.copy()
+        state['_observer'] = None
+        state['_timed_actions'] = None
+        if self._actions_name is not None:
+            state['_actions'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        """
+
+        :param state:
+        :return:
+        """
+
+        self.__dict__.update(state)
+        if self._actions_name is not None:
+            self._actions = Lexer.resolve(self._actions_name)
+
+    def parse_batch(self, docs: Iterable[Union[str, PathLike]], paths: bool = False, evaluate: bool = False,
+                    workers: Optional[int] = None, ordered: bool = True) -> Iterator[Parser.Result]:
+        """
+        Parses or evaluates many documents in a pool of processes.
+
+        The parser is pickled to the workers, so actions given as lambdas or closures should be given by importable
+        name instead. ASTs come back without evalfns set on their nodes, and with this parser's actions.
+
+        :raise ValueError:
+            When the parser can't be pickled
+
+        :param docs: texts, or files if paths
+        :param paths: whether docs are files
+        :param evaluate: give the values of the documents instead of their ASTs
+        :param workers: number of processes, all CPUs if None, this process if 1
+        :param ordered: give the results in the order of docs, else as they finish
+        :return: a Result for each document
+        """
+
+        docs = list(docs)
+        if workers == 1:
+            for n, doc in enumerate(docs):
+                yield Parser.Result(n, doc, *Parser._batch_run(self, doc, paths, evaluate))
+            return
+        try:
+            state = pickle.dumps(self)
+        except (pickle.PicklingError, AttributeError, TypeError) as err:
+            raise ValueError("parser can't be sent to worker processes, give its actions by name: {}".format(err))
+        with ProcessPoolExecutor(workers, initializer=Parser._batch_init, initargs=(state, )) as pool:
+            futures = {pool.submit(Parser._batch_item, doc, paths, evaluate): n for n, doc in enumerate(docs)}
+            for future in (futures if ordered else as_completed(futures)):
+                n = futures[future]
+                try:
+                    value, err = future.result()
+                except Exception as exc:
+                    # The value or error couldn't be sent back
+                    value, err = None, exc
+                if isinstance(value, AST) and not evaluate:
+                    nodes = [value]
+                    while nodes:
+                        node = nodes.pop()
+                        node.actions = self.actions
+                        nodes += node.children
+                yield Parser.Result(n, docs[n], value, err)
+
+    @staticmethod
+    def _batch_init(state: bytes):
+        """
+        Loads the parser of a parse_batch() worker.
+
+        :param state: pickled parser
+        :return:
+        """
+
+        Parser._worker = pickle.loads(state)
+
+    @staticmethod
+    def _batch_item(doc: Union[str, PathLike], paths: bool, evaluate: bool) -> Tuple[Any, Optional[Exception]]:
+        """
+        Parses one document of parse_batch() with the worker's parser.
+
+        :param doc:
+        :param paths:
+        :param evaluate:
+        :return: (value, error)
+        """
+
+        return Parser._batch_run(Parser._worker, doc, paths, evaluate)
+
+    @staticmethod
+    def _batch_run(parser: Parser, doc: Union[str, PathLike], paths: bool,
+                   evaluate: bool) -> Tuple[Any, Optional[Exception]]:
+        """
+        Parses one document of parse_batch() with parser.
+
+        :param parser:
+        :param doc:
+        :param paths:
+        :param evaluate:
+        :return: (value, error)
+        """
+
+        try:
+            if paths:
+                return (parser.eval_file(doc) if evaluate else parser.parse_file(doc)), None
+            return (parser.eval(doc) if evaluate else parser.parse(doc)), None
+        except Exception as err:
+            return None, err
+
     def get_tokens(self, string: Iterable, file: PathLike = "") -> Lexer.Iter:
         """
 
@@ -60,3 +228,13 @@ class Parser:
         """
 
         return self.lexer.tokenize_file(path)
+
+    def get_tokens_from_stream(self, stream: Union[IO, Iterable], file: PathLike = "") -> Lexer.StreamIter:
+        """
+
+        :param stream:
+        :param file:
+        :return:
+        """
+
+        return self.lexer.tokenize_stream(stream, file)
@@ -0,0 +1,43 @@
+import pytest
+
+from parsepy.lexer import Lexer
+from parsepy.parser import CFG
+from parsepy.parser.ll1 import LL1
+
+
+@pytest.fixture(scope="session")
+def expr_lexer():
+    return Lexer({
+        "t_plus": r"\+",
+        "t_mult": r"\*",
+        "t_lparen": r"\(",
+        "t_rparen": r"\)",
+        "t_id": r"[A-Za-z_]\w*",
+        "t_ws": r"[ \t\n]+",
+    }, {"t_ws": lambda a: None})
+
+
+@pytest.fixture(scope="session")
+def expr_cfg():
+    return CFG.parse("""E  -> T E'
+                        E' -> t_mult T E' | ε
+                        T  -> F T'
+                        T' -> t_plus F T' |
+                        F  -> t_lparen E t_rparen | t_id""")
+
+
+@pytest.fixture(scope="session")
+def expr_parser(expr_lexer, expr_cfg):
+    return LL1(expr_lexer, expr_cfg)
+
+
+def join(vals):
+    return "".join(v if isinstance(v, str) else v.text for v in vals[1:] if v is not None)
+
+
+@pytest.fixture(scope="session")
+def expr_eval_parser(expr_lexer, expr_cfg):
+    # Actions give the text of a node without whitespace, parentheses as brackets
+    actions = {n: join for n in range(len(expr_cfg.productions))}
+    actions[6] = lambda vals: "[{}]".format(join(vals)[1:-1])
+    return LL1(expr_lexer, expr_cfg, actions)
@@ -0,0 +1,42 @@
+from parsepy.lexer import Token
+from parsepy.parser import AST, CFG
+
+SOURCE = "(A +\n  B) * C  \n\n"
+
+
+def test_text_spans_lines(expr_parser):
+    root = expr_parser.parse(SOURCE)
+    paren = root.children[0].children[0]
+    assert str(paren.value) == "F -> t_lparen E t_rparen"
+    assert paren.text == SOURCE[paren.start:paren.end] == "(A +\n  B)"
+    assert (paren.line, paren.col) == (1, 1)
+    assert root.text == SOURCE[root.start:root.end] == "(A +\n  B) * C"
+    inner = paren.children[1]
+    assert inner.text == "A +\n  B"
+
+
+def test_make_links_and_evalfn():
+    add = CFG.Prod(CFG.NonTerm("S"), ["t_id", "t_plus", "t_id"], 0)
+    empty = CFG.Prod(CFG.NonTerm("S"), [CFG.EPSILON], 1)
+    actions = {0: lambda vals: vals[1].text + vals[3].text}
+    source = "a+b"
+    root = AST.make(add, 1, 1, "f", 0, 3, source, actions=actions)
+    leaves = [AST.make(Token(t, x, x, 1, n + 1, "f", n, n + 1), 1, n + 1, "f", n, n + 1, source, actions=actions,
+                       parent=root) for n, (t, x) in enumerate([("t_id", "a"), ("t_plus", "+"), ("t_id", "b")])]
+    assert root.children == leaves
+    assert all(leaf.parent is root for leaf in leaves)
+    assert root.parent is None
+    assert [leaf.text for leaf in leaves] == ["a", "+", "b"]
+
+    # Action of the production, then the shared defaults
+    assert root.evalfn is actions[0]
+    assert all(leaf.evalfn is AST.eval_token for leaf in leaves)
+    assert AST.make(empty, 1, 1, "f", 0, 0, source, actions=actions).evalfn is AST.eval_prod
+    assert AST.make(add, 1, 1, "f", 0, 3, source).evalfn is AST.eval_prod
+    assert root.eval() == "ab"
+
+    # An explicit evalfn comes before the action
+    root.evalfn = lambda vals: len(vals)
+    assert root.eval() == 4
+    root.evalfn = None
+    assert root.evalfn is actions[0]
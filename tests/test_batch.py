@@ -0,0 +1,58 @@
+import pytest
+
+from parsepy.lexer import Lexer
+from parsepy.parser.error import UnexpToken, UnkToken
+from parsepy.parser.ll1 import LL1
+
+LEXER_ACTIONS = {"t_ws": lambda a: None}
+# Texts of the productions without whitespace, by production index
+ACTIONS = {n: lambda vals: "".join(v if isinstance(v, str) else v.text for v in vals[1:] if v is not None)
+           for n in range(8)}
+
+DOCS = ["A * (B + C)", "A + ", "(A)", "A $ B", "A * ) B", "D"]
+
+
+@pytest.fixture(scope="module")
+def named_parser(expr_cfg):
+    lexer = Lexer({
+        "t_plus": r"\+",
+        "t_mult": r"\*",
+        "t_lparen": r"\(",
+        "t_rparen": r"\)",
+        "t_id": r"[A-Za-z_]\w*",
+        "t_ws": r"[ \t\n]+",
+    }, "{}:LEXER_ACTIONS".format(__name__))
+    return LL1(lexer, expr_cfg, "{}:ACTIONS".format(__name__))
+
+
+def outcome(result):
+    return result.index, result.source, type(result.error)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_parse(named_parser, workers):
+    results = list(named_parser.parse_batch(DOCS, workers=workers))
+    assert [outcome(r) for r in results] == [
+        (0, DOCS[0], type(None)), (1, DOCS[1], UnexpToken), (2, DOCS[2], type(None)),
+        (3, DOCS[3], UnkToken), (4, DOCS[4], UnexpToken), (5, DOCS[5], type(None))]
+    for result in results:
+        if result.error is None:
+            assert result.value.text == DOCS[result.index]
+            assert result.value.actions is named_parser.actions
+            assert result.value.eval() == named_parser.eval(DOCS[result.index])
+        else:
+            assert result.value is None
+    assert LL1._worker is None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_eval(named_parser, workers):
+    results = list(named_parser.parse_batch(DOCS, evaluate=True, workers=workers))
+    assert [r.value for r in results] == ["A*(B+C)", None, "(A)", None, None, "D"]
+    assert [type(r.error) for r in results] == [type(None), UnexpToken, type(None), UnkToken, UnexpToken,
+                                                type(None)]
+
+
+def test_batch_unordered(named_parser):
+    results = sorted(named_parser.parse_batch(DOCS, evaluate=True, workers=2, ordered=False))
+    assert [r.index for r in results] == list(range(len(DOCS)))
@@ -0,0 +1,61 @@
+import operator
+import pickle
+
+import pytest
+
+from parsepy.parser import CFG
+from parsepy.parser.ll1 import LL1
+
+TOKENS = {"t_plus": r"\+", "t_id": r"[A-Za-z_]\w*", "t_ws": r"\s+"}
+GRAMMAR = """E  -> t_id E'
+             E' -> t_plus t_id E' | ε"""
+LEXER_ACTIONS = {"t_ws": lambda a: None}
+
+
+def build(path, tokens=TOKENS, grammar=GRAMMAR):
+    return LL1.cached(path, tokens, grammar, lexer_actions=LEXER_ACTIONS)
+
+
+def test_cache_hit(tmp_path, monkeypatch):
+    path = tmp_path / "expr.cache"
+    build(path)
+    monkeypatch.setattr(CFG, "parse", lambda *args: pytest.fail("cache not used"))
+    parser = build(path)
+    assert parser.lexer.actions is LEXER_ACTIONS
+    assert parser.parse("a + b").text == "a + b"
+
+
+def test_cache_stale(tmp_path):
+    path = tmp_path / "expr.cache"
+    build(path)
+    data = path.read_bytes()
+    parser = build(path, grammar=GRAMMAR.replace("t_plus", "t_star"), tokens={**TOKENS, "t_star": r"\*"})
+    assert parser.parse("a * b").text == "a * b"
+    assert path.read_bytes() != data
+    assert build(path).parse("a + b").text == "a + b"
+
+
+@pytest.mark.parametrize("cut", [0, 1, 10, -10])
+def test_cache_corrupt(tmp_path, cut):
+    path = tmp_path / "expr.cache"
+    build(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:cut] if cut else b"\x80\x05garbage")
+    assert build(path).parse("a + b").text == "a + b"
+    assert path.read_bytes() == data
+
+
+class Fails:
+    def __init__(self, *args):
+        self.args = args
+
+    def __reduce__(self):
+        return operator.getitem, self.args
+
+
+@pytest.mark.parametrize("state", [Fails({}, "key"), Fails([], 0), Fails(None, 0)])
+def test_cache_load_fails(tmp_path, state):
+    path = tmp_path / "expr.cache"
+    path.write_bytes(pickle.dumps(state))
+    assert build(path).parse("a + b").text == "a + b"
+    assert build(path).parse("a + b").text == "a + b"
@@ -0,0 +1,30 @@
+from parsepy.lexer import Lexer
+from parsepy.parser import CFG
+
+
+def test_first_skips_nullable_item():
+    cfg = CFG.parse("""S -> A b
+                       A -> ε""")
+    assert cfg.first("S") == {"b"}
+    assert cfg.first("A") == {CFG.EPSILON}
+    assert cfg.follow("A") == {"b"}
+
+
+def test_left_recursive_follow():
+    cfg = CFG.parse("""E -> E t_plus T | T
+                       T -> T t_mult F | F
+                       F -> t_lparen E t_rparen | t_id""")
+    assert cfg.first("E") == cfg.first("T") == cfg.first("F") == {"t_lparen", "t_id"}
+    assert cfg.follow("E") == {"t_plus", "t_rparen", Lexer.EOI}
+    assert cfg.follow("T") == cfg.follow("F") == {"t_plus", "t_mult", "t_rparen", Lexer.EOI}
+
+
+def test_productions_assigned_reanalyzed():
+    cfg = CFG.parse("""S -> A b
+                       A -> a""")
+    analysis = cfg.analyze()
+    assert cfg.first("S") == {"a"}
+    cfg.productions = cfg.productions + [CFG.Prod(CFG.NonTerm("A"), [CFG.EPSILON])]
+    assert cfg.analyze() is not analysis
+    assert cfg.first("S") == {"a", "b"}
+    assert cfg.first("A") == {"a", CFG.EPSILON}
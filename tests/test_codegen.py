@@ -0,0 +1,56 @@
+import importlib.util
+
+import pytest
+
+from parsepy.parser import CFG
+from parsepy.parser.codegen import CodeGen
+from parsepy.parser.error import ParserError
+
+
+@pytest.fixture(scope="module")
+def parsers(tmp_path_factory, expr_lexer, expr_cfg, expr_parser):
+    path = tmp_path_factory.mktemp("gen") / "expr.py"
+    CodeGen(expr_lexer, expr_cfg, expr_parser).write(path)
+    spec = importlib.util.spec_from_file_location("expr", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return expr_parser, module
+
+
+def same_tree(a, b):
+    if isinstance(a.value, CFG.Prod):
+        if not isinstance(b.value, CFG.Prod) or (a.value.rule, a.value.idx, list(a.value)) != \
+                (b.value.rule, b.value.idx, list(b.value)):
+            return False
+    elif a.value != b.value:
+        return False
+    return len(a.children) == len(b.children) and all(map(same_tree, a.children, b.children))
+
+
+def test_codegen_same_text(parsers):
+    parser, module = parsers
+    text = "A * (B + C) * D"
+    assert module.parse(text, lexer_actions={"t_ws": lambda a: None}).text == parser.parse(text).text == text
+
+
+@pytest.mark.parametrize("text", ["A", "A * (B + C) * D", "(A + B) * C + D * (E)"])
+def test_codegen_same_tree(parsers, text):
+    parser, module = parsers
+    tree = module.parse(text, lexer_actions={"t_ws": lambda a: None})
+    assert same_tree(tree, parser.parse(text))
+    assert tree.value is not parser.parse(text).value
+
+
+def test_codegen_tokens_settled_by_master(parsers):
+    parser, module = parsers
+    assert set(module._FINAL.values()) == {"t_plus", "t_mult", "t_lparen", "t_rparen", "t_id", "t_ws"}
+
+
+def test_codegen_too_deep(parsers):
+    parser, module = parsers
+    text = "(" * 5000 + "A" + ")" * 5000
+    assert parser.parse(text).text == text
+    with pytest.raises(ParserError):
+        module.parse(text)
+    with pytest.raises(ParserError):
+        module.evaluate(text)
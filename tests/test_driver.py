@@ -0,0 +1,43 @@
+import pytest
+
+from parsepy.parser.error import UnexpToken
+from parsepy.parser.ll1 import LL1
+
+DEEP = "(" * 5000 + "A" + ")" * 5000
+LONG = " * ".join(["A"] * 20000)
+
+
+@pytest.mark.parametrize("text, tokens", [(DEEP, 10001), (LONG, 39999)], ids=["deep", "long"])
+def test_driver_deep_and_long(expr_parser, text, tokens):
+    assert expr_parser.parse(text).text == text
+    events = list(expr_parser.events(text))
+    assert sum(1 for e in events if e.kind == LL1.Event.TOKEN) == tokens
+    assert sum(1 for e in events if e.kind == LL1.Event.ENTER) == sum(1 for e in events if e.kind == LL1.Event.EXIT)
+    assert (events[-1].kind, events[-1].prod, events[-1].start, events[-1].end) == (LL1.Event.EXIT, 0, 0, len(text))
+    root, errors = expr_parser.parse_recover(text)
+    assert errors == []
+    assert root.text == text
+
+
+def test_driver_deep_error(expr_parser):
+    root, errors = expr_parser.parse_recover(DEEP[:-1] + " ) )")
+    assert [err.token.col for err in errors] == [len(DEEP) + 3]
+    assert root.text == DEEP[:-1] + " )"
+
+
+def test_table_membership(expr_parser, expr_cfg):
+    table = expr_parser.table
+    for code, rule in enumerate(table.rules, table.nterms):
+        select = set()
+        for prod in expr_cfg.productions:
+            if prod.rule == rule:
+                select |= expr_cfg.select(prod)
+        assert table.expected(code) == select
+        assert {table.terms[n] for n, bit in enumerate(table.follows[code - table.nterms]) if bit} == \
+            expr_cfg.follow(rule)
+
+
+def test_unexpected_names_expected(expr_parser):
+    with pytest.raises(UnexpToken, match="t_id") as info:
+        expr_parser.parse("A * )")
+    assert "t_lparen" in str(info.value)
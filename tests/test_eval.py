@@ -0,0 +1,86 @@
+from collections import Counter
+
+import pytest
+
+from parsepy.parser import AST
+
+
+def nodes(tree):
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children)
+
+
+@pytest.fixture
+def counted(expr_parser):
+    tree = expr_parser.parse("A * (B + C) * (D + E * F)")
+    calls = Counter()
+
+    def evalfn(node):
+        def call(vals):
+            calls[id(node)] += 1
+            return node.text if not node.children else tuple(vals[1:])
+        return call
+
+    for node in nodes(tree):
+        node.evalfn = evalfn(node)
+    return tree, calls
+
+
+def test_evaluator_reuses_subtree(counted):
+    tree, calls = counted
+    expected = tree.eval()
+    calls.clear()
+    evaluator = AST.Evaluator(tree)
+    sub = tree.children[1].children[1]
+    assert evaluator.eval(sub) == sub.eval()
+    calls.clear()
+    evaluator = AST.Evaluator(tree)
+    evaluator.eval(sub)
+    assert evaluator.eval() == expected
+    assert set(calls.values()) == {1}
+    assert len(calls) == len(list(nodes(tree)))
+
+
+def test_evaluator_step(counted):
+    tree, calls = counted
+    expected = tree.eval()
+    evaluator = AST.Evaluator(tree)
+    evaluator.start()
+    steps = 0
+    while not evaluator.step(1):
+        steps += 1
+        with pytest.raises(ValueError):
+            evaluator.value
+    assert evaluator.done
+    assert evaluator.value == expected
+    assert steps == len(list(nodes(tree))) - 1
+
+
+@pytest.mark.parametrize("text", ["A", "A * (B + C) * D", "((A + B) * C + D) * (E)"])
+def test_eval_without_tree(expr_eval_parser, text):
+    value = expr_eval_parser.eval(text, build_tree=False)
+    assert value == expr_eval_parser.eval(text) == expr_eval_parser.parse(text).eval()
+    tokens = expr_eval_parser.lexer.tokenize_array(text)
+    assert expr_eval_parser.eval(tokens, build_tree=False) == value
+
+
+def test_eval_file_without_tree(expr_eval_parser, tmp_path):
+    path = tmp_path / "expr.txt"
+    path.write_text("A * (B +\n C)\n")
+    assert expr_eval_parser.eval_file(path, build_tree=False) == expr_eval_parser.eval_file(path) == "A*[B+C]"
+
+
+@pytest.mark.parametrize("text, value", [("(" * 5000 + "A" + ")" * 5000, "[" * 5000 + "A" + "]" * 5000),
+                                         (" + ".join(["A"] * 50000), "+".join(["A"] * 50000))],
+                         ids=["deep", "long"])
+def test_evaluator_deep(expr_eval_parser, text, value):
+    tree = expr_eval_parser.parse(text)
+    assert tree.eval() == value
+    evaluator = AST.Evaluator(tree)
+    evaluator.start()
+    while not evaluator.step(1):
+        pass
+    assert evaluator.value == value
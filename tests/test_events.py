@@ -0,0 +1,34 @@
+import pytest
+
+from parsepy.parser import CFG
+from parsepy.parser.error import UnexpToken
+from parsepy.parser.ll1 import LL1
+
+
+def expected(node):
+    if not isinstance(node.value, CFG.Prod):
+        return [(LL1.Event.TOKEN, -1, node.value.text, node.start, node.end)]
+    events = [(LL1.Event.ENTER, node.value.idx, None, node.start, node.start)]
+    for child in node.children:
+        events += expected(child)
+    return events + [(LL1.Event.EXIT, node.value.idx, None, node.start, node.end)]
+
+
+def steps(events):
+    return [(e.kind, e.prod, e.token.text if e.kind == LL1.Event.TOKEN else None, e.start, e.end) for e in events]
+
+
+@pytest.mark.parametrize("text", ["A", "A * (B + C) * D", "(A + B) * C +\n  D * (E)"])
+def test_events_same_tree(expr_parser, text):
+    events = list(expr_parser.events(text))
+    assert steps(events) == expected(expr_parser.parse(text))
+
+
+def test_events_before_error(expr_parser):
+    events = expr_parser.events("A B")
+    got = []
+    with pytest.raises(UnexpToken):
+        for event in events:
+            got.append(event)
+    # F -> t_id is complete before B is found unexpected
+    assert steps(got)[-1] == (LL1.Event.EXIT, 7, None, 0, 1)
@@ -0,0 +1,25 @@
+import pytest
+
+TEXTS = ["A", "A * (B + C) * D", "(A + B) * C +\n  D * (E)"]
+
+
+def same_nodes(flat, node):
+    assert flat.value == node.value
+    assert (flat.text, flat.line, flat.col, flat.start, flat.end) == (node.text, node.line, node.col, node.start,
+                                                                     node.end)
+    assert len(flat) == len(node.children)
+    for flat_child, child in zip(flat, node.children):
+        assert flat_child.parent == flat
+        same_nodes(flat_child, child)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_flat_same_tree(expr_eval_parser, text):
+    tree = expr_eval_parser.parse_flat(text)
+    assert tree.root.parent is None
+    same_nodes(tree.root, expr_eval_parser.parse(text))
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_flat_same_value(expr_eval_parser, text):
+    assert expr_eval_parser.parse_flat(text).eval() == expr_eval_parser.eval(text)
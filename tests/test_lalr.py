@@ -0,0 +1,59 @@
+import pytest
+
+from parsepy.lexer import Lexer
+from parsepy.parser import CFG
+from parsepy.parser.error import ParserError, UnexpToken
+from parsepy.parser.lalr import LALR1
+
+
+@pytest.fixture(scope="module")
+def lexer():
+    return Lexer({
+        "t_plus": r"\+",
+        "t_mult": r"\*",
+        "t_lparen": r"\(",
+        "t_rparen": r"\)",
+        "t_num": r"\d+",
+        "t_if": r"if\b",
+        "t_else": r"else\b",
+        "t_id": r"[A-Za-z_]\w*",
+        "t_ws": r"[ \t]+",
+    }, {"t_ws": lambda a: None})
+
+
+@pytest.fixture(scope="module")
+def parser(lexer):
+    cfg = CFG.parse("""E -> E t_plus T | T
+                       T -> T t_mult F | F
+                       F -> t_lparen E t_rparen | t_num""")
+    return LALR1(lexer, cfg, {
+        0: lambda vals: vals[1] + vals[3],
+        1: lambda vals: vals[1],
+        2: lambda vals: vals[1] * vals[3],
+        3: lambda vals: vals[1],
+        4: lambda vals: vals[2],
+        5: lambda vals: int(vals[1].text),
+    })
+
+
+def test_lalr_left_recursive(parser):
+    text = "1 + 2 * (3 + 4) * 5 + 6"
+    root = parser.parse(text)
+    assert root.text == text
+    assert root.eval() == 77
+
+
+def test_lalr_trailing_tokens(parser):
+    with pytest.raises(UnexpToken):
+        parser.parse("1 + 2 )")
+
+
+@pytest.mark.parametrize("grammar, message", [
+    ("R0 -> R0 | t_num", "reducing R0 -> R0 and R0' -> R0"),
+    ("S -> A | B\nA -> t_num\nB -> t_num", "Reduce/reduce conflict on EOI"),
+    ("S -> t_if S | t_if S t_else S | t_id", "Shift/reduce conflict on t_else"),
+])
+def test_lalr_conflicts(lexer, grammar, message):
+    with pytest.raises(ParserError) as info:
+        LALR1(lexer, CFG.parse(grammar))
+    assert message in str(info.value)
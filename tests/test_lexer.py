@@ -0,0 +1,47 @@
+import pytest
+
+from parsepy.lexer import Lexer
+
+TEXT = "ab = 12\n  cd\n\nx=y\n"
+
+
+@pytest.fixture(scope="module", params=sorted(Lexer.ENGINES))
+def lexer(request):
+    return Lexer({
+        "t_id": r"[a-z]+",
+        "t_num": r"\d+",
+        "t_eq": r"=",
+        "t_nl": r"\n",
+        "t_sp": r" +",
+    }, {"t_sp": lambda a: None}, request.param)
+
+
+def test_token_offsets(lexer):
+    tokens = list(lexer.tokenize(TEXT))
+    assert [(t.type, t.text, t.line, t.col, t.start, t.end) for t in tokens[:-1]] == [
+        ("t_id", "ab", 1, 1, 0, 2),
+        ("t_eq", "=", 1, 4, 3, 4),
+        ("t_num", "12", 1, 6, 5, 7),
+        ("t_nl", "\n", 1, 8, 7, 8),
+        ("t_id", "cd", 2, 3, 10, 12),
+        ("t_nl", "\n", 2, 5, 12, 13),
+        ("t_nl", "\n", 3, 1, 13, 14),
+        ("t_id", "x", 4, 1, 14, 15),
+        ("t_eq", "=", 4, 2, 15, 16),
+        ("t_id", "y", 4, 3, 16, 17),
+        ("t_nl", "\n", 4, 4, 17, 18),
+    ]
+    assert all(TEXT[t.start:t.end] == t.text for t in tokens)
+    assert (tokens[-1].type, tokens[-1].start, tokens[-1].end) == (Lexer.EOI, len(TEXT), len(TEXT))
+
+
+def test_get_token_at_offset(lexer):
+    assert lexer.get_token(TEXT, 10) == ("t_id", "cd", "cd", 2)
+    assert lexer.get_token(TEXT, 7) == ("t_nl", "\n", "\n", 1)
+    assert lexer.get_token(TEXT, 8)[0] == "t_sp"
+
+
+def test_locate_line_starts():
+    it = Lexer({"t_id": r"[a-z]+"}).tokenize("ab\ncd\n\nef")
+    assert [it.locate(pos) for pos in (0, 1, 2, 3, 5, 6, 7, 8)] == [
+        (1, 1), (1, 2), (1, 3), (2, 1), (2, 3), (3, 1), (4, 1), (4, 2)]
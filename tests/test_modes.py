@@ -0,0 +1,85 @@
+import io
+
+import pytest
+
+from parsepy.lexer import Lexer
+
+TEXT = "if x1 == 'a b' then\n  y = 3.14 + é\nend 'c' zz\n" * 20
+# Bytes patterns match \w only in ASCII, and mapped columns count bytes
+ASCII = TEXT.replace("é", "e")
+
+
+def lexer():
+    return Lexer({
+        "t_if": r"if\b",
+        "t_eq": r"==",
+        "t_set": r"=",
+        "t_plus": r"\+",
+        "t_num": r"\d+(\.\d*)?",
+        "t_str": r"'[^']*'",
+        "t_id": r"\w+",
+        "t_ws": r"\s+",
+    }, {"t_ws": lambda a: None})
+
+
+def spans(tokens):
+    return [(t.type, t.text, t.line, t.col) for t in tokens]
+
+
+def test_array_same_tokens():
+    lx = lexer()
+    assert spans(lx.tokenize_array(TEXT)) == spans(lx.tokenize(TEXT))
+
+
+def test_mmap_same_tokens(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text(ASCII, encoding="utf-8")
+    lx = lexer()
+    assert spans(lx.tokenize_file(path, memory_map=True)) == spans(lx.tokenize(ASCII))
+
+
+@pytest.mark.parametrize("size", [1, 5, 64])
+def test_stream_same_tokens(size):
+    lx = lexer()
+    chunks = [TEXT[n:n + size] for n in range(0, len(TEXT), size)]
+    assert spans(lx.tokenize_stream(chunks, lookahead=16)) == spans(lx.tokenize(TEXT))
+
+
+def test_stream_file_same_tokens():
+    lx = lexer()
+    stream = io.BytesIO(TEXT.encode("utf-8"))
+    assert spans(lx.tokenize_stream(stream, lookahead=16)) == spans(lx.tokenize(TEXT))
+
+
+def test_mmap_open_after_eoi(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text(ASCII, encoding="utf-8")
+    t_iter = lexer().tokenize_file(path, memory_map=True)
+    tokens = list(t_iter)
+    assert not t_iter.closed
+    path.unlink()
+    assert "".join(token.text for token in tokens) == "".join(token.text for token in lexer().tokenize(ASCII))
+
+
+def test_mmap_closed_by_with(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text(ASCII, encoding="utf-8")
+    with lexer().tokenize_file(path, memory_map=True) as t_iter:
+        tokens = list(t_iter)
+    assert t_iter.closed
+    assert spans(tokens) == spans(lexer().tokenize(ASCII))
+
+
+@pytest.mark.parametrize("encoding", ["utf-16", "utf-32-le", "no-such-codec"])
+def test_mmap_rejects_encoding(tmp_path, encoding):
+    path = tmp_path / "text.txt"
+    path.write_text(ASCII, encoding="utf-16")
+    with pytest.raises(ValueError):
+        lexer().tokenize_file(path, memory_map=True, encoding=encoding)
+
+
+def test_mmap_latin_1(tmp_path):
+    path = tmp_path / "text.txt"
+    path.write_text(ASCII, encoding="latin-1")
+    lx = lexer()
+    assert spans(lx.tokenize_file(path, memory_map=True, encoding="latin-1")) == spans(lx.tokenize(ASCII))
@@ -0,0 +1,60 @@
+from collections import Counter
+
+import pytest
+
+from parsepy.observer import Stats
+from parsepy.parser import CFG
+
+TEXT = "A * (B + C) * (D + E)"
+
+
+@pytest.fixture
+def observed(expr_eval_parser):
+    stats = Stats()
+    expr_eval_parser.observer = stats
+    yield expr_eval_parser, stats
+    expr_eval_parser.observer = None
+
+
+def counts(tree):
+    prods, tokens = Counter(), Counter()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node.value, CFG.Prod):
+            prods[node.value.idx] += 1
+        else:
+            tokens[node.value.type] += 1
+        stack.extend(node.children)
+    return prods, tokens
+
+
+def test_stats_parse(observed):
+    parser, stats = observed
+    tree = parser.parse(TEXT)
+    prods, tokens = counts(tree)
+    assert stats.expansions == prods
+    assert {t: n for t, n in stats.tokens.items() if t != "t_ws"} == tokens
+    assert stats.attempts >= sum(stats.tokens.values())
+    assert {"lex", "parse"} <= set(stats.times)
+    assert tree.text == TEXT
+
+
+def test_stats_eval(observed):
+    parser, stats = observed
+    value = parser.eval(TEXT)
+    prods, tokens = counts(parser.parse(TEXT))
+    assert stats.calls == prods
+    assert {"eval", "action"} <= set(stats.times)
+    parser.observer = None
+    assert parser.eval(TEXT) == value
+    assert parser.eval(TEXT, build_tree=False) == value
+
+
+def test_stats_removed(expr_eval_parser):
+    stats = Stats()
+    expr_eval_parser.observer = stats
+    expr_eval_parser.observer = None
+    expr_eval_parser.eval(TEXT)
+    assert stats.expansions == stats.tokens == stats.calls == {}
+    assert stats.times == {}
@@ -0,0 +1,42 @@
+import re
+
+from parsepy.lexer import Lexer
+from parsepy.lexer.scanner import Scanner
+
+
+def lexer(string=r"'[^']*'"):
+    return Lexer({"id": r"[a-z]+", "q": r"'", "str": string, "ws": r"\s+"})
+
+
+def spans(tokens):
+    return [(tokens.type(i), tokens.starts[i], tokens.ends[i]) for i in range(len(tokens) - 1)]
+
+
+def test_parallel_tokens_across_splits():
+    text = "ab 'c\nd' ef\n" * 200
+    lx = lexer()
+    tokens = lx.tokenize_parallel(text, chunk_size=40, overlap=16, workers=2)
+    assert spans(tokens) == spans(lx.tokenize_array(text))
+
+
+def test_parallel_line_strings():
+    text = "ab 'c d' ef\n \n" * 200 + "'x\n"
+    lx = lexer(r"'[^'\n]*'")
+    tokens = lx.tokenize_parallel(text, chunk_size=40, overlap=16, workers=2)
+    assert spans(tokens) == spans(lx.tokenize_array(text))
+
+
+def test_parallel_token_longer_than_overlap():
+    text = "ab\n'" + "x\n" * 100 + "'\ncd\n" * 20
+    lx = lexer()
+    tokens = lx.tokenize_parallel(text, chunk_size=10, overlap=8, workers=2)
+    assert spans(tokens) == spans(lx.tokenize_array(text))
+
+
+def test_reach():
+    assert Scanner.reach(re.compile(r"[a-z]+"), "\n") == 0
+    assert Scanner.reach(re.compile(r"\s+"), "\n") == 1
+    assert Scanner.reach(re.compile(r"k1\b"), "k") == 3
+    assert Scanner.reach(re.compile(r"'[^'\n]*'"), "\n") == 0
+    assert Scanner.reach(re.compile(r"'[^']*'"), "\n") is None
+    assert Scanner.reach(re.compile(r"(?s)/\*.*?\*/"), "\n") is None
@@ -0,0 +1,33 @@
+import pytest
+
+from parsepy.parser.error import UnexpToken, UnkToken
+
+
+def test_recover_valid(expr_parser):
+    root, errors = expr_parser.parse_recover("A * (B + C)")
+    assert errors == []
+    assert root.text == "A * (B + C)"
+
+
+@pytest.mark.parametrize("text, col", [("A ) B", 3), ("A * B ) ( C", 7), ("(A) )", 5)])
+def test_recover_trailing_tokens(expr_parser, text, col):
+    root, errors = expr_parser.parse_recover(text)
+    assert len(errors) == 1
+    assert isinstance(errors[0], UnexpToken)
+    assert errors[0].token.col == col
+    assert "end of input" in str(errors[0])
+    assert root is not None
+
+
+def test_recover_errors_in_order(expr_parser):
+    root, errors = expr_parser.parse_recover("A + $ * ( B ) C")
+    assert [type(err) for err in errors] == [UnkToken, UnexpToken]
+    assert [err.token.col for err in errors] == [5, 15]
+
+
+@pytest.mark.parametrize("text, cols, rest", [(") A", [1], "A"), ("A + + + B * ) C (", [5, 7, 13], "A + + + B *")])
+def test_recover_token_reported_once(expr_parser, text, cols, rest):
+    root, errors = expr_parser.parse_recover(text)
+    assert all(isinstance(err, UnexpToken) for err in errors)
+    assert [err.token.col for err in errors] == cols
+    assert root.text == rest
@@ -0,0 +1,44 @@
+import pytest
+
+from parsepy.lexer import Lexer
+from parsepy.parser import CFG
+from parsepy.parser.ll1 import LL1
+
+
+def nodes(tree):
+    out = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        out.append((str(node.value), node.start, node.end, node.line, node.col, node.file, node.text))
+        stack.extend(reversed(node.children))
+    return out
+
+
+@pytest.mark.parametrize("edit", [(0, 0, "B * "), (5, 6, "(C +\n D)"), (6, 10, ""), (23, 24, "X"), (25, 25, " + A")])
+def test_reparse_same_as_parse(expr_parser, edit):
+    text = "A * (B + C)\n* D + (E * F)"
+    start, end, inserted = edit
+    new = text[:start] + inserted + text[end:]
+    tree = expr_parser.reparse(expr_parser.parse(text), text, edit)
+    assert nodes(tree) == nodes(expr_parser.parse(new))
+
+
+def test_reparse_successive_edits(expr_parser):
+    text = "(A + B)\n* (C + D)\n* (E + F)"
+    tree = expr_parser.parse(text)
+    for old, inserted in [("A", "X * Y"), ("C + D", "(\nC + D)"), ("D", "\nG\n"), ("E + F", "H"), (None, " * Z")]:
+        start = len(text) if old is None else text.index(old)
+        end = start if old is None else start + len(old)
+        tree = expr_parser.reparse(tree, text, (start, end, inserted))
+        text = text[:start] + inserted + text[end:]
+        assert nodes(tree) == nodes(expr_parser.parse(text))
+
+
+def test_reparse_token_reaching_into_edit():
+    lexer = Lexer({"id": r"[a-z]+", "q": r"'", "str": r"'[^']*'", "ws": r"\s+"}, {"ws": lambda a: None})
+    parser = LL1(lexer, CFG.parse("""S -> I S | ε
+                                     I -> id | q | str"""))
+    text = "'a b"
+    tree = parser.reparse(parser.parse(text), text, (4, 4, "'"))
+    assert nodes(tree) == nodes(parser.parse("'a b'"))
@@ -0,0 +1,55 @@
+import pytest
+
+from parsepy.lexer import Lexer
+
+TOKENS = {
+    "t_if": r"if\b",
+    "t_plus": r"\+",
+    "t_incr": r"\+\+",
+    "t_num": r"\d+",
+    "t_real": r"\d+\.\d*",
+    "t_quote": r"'",
+    "t_str": r"'[^']*'",
+    "t_select": r"(?i:select)",
+    "t_id": r"[A-Za-z_]\w*",
+    "t_pair": r"(a)\1",
+    "t_ws": r"\s+",
+}
+
+TEXT = "if iffy ++ + 'a b' ' 3.14 42 SeLeCt aa selection x+++y 'open\n" * 5
+
+
+def spans(tokens):
+    return [(t.type, t.text, t.start, t.end, t.line, t.col) for t in tokens]
+
+
+def keywords(count):
+    tokens = {"k{}".format(n): r"k{}\b".format(n) for n in range(count)}
+    tokens.update({"t_id": r"[a-z_]+", "t_semi": ";", "t_ws": r"\s+"})
+    text = " ".join("k{} abc;".format(n * 7 % count) for n in range(200))
+    return tokens, text
+
+
+@pytest.mark.parametrize("engine", ["master", "dispatch"])
+def test_engines_same_tokens(engine):
+    assert spans(Lexer(TOKENS, engine=engine).tokenize(TEXT)) == spans(Lexer(TOKENS, engine="regex").tokenize(TEXT))
+
+
+@pytest.mark.parametrize("engine", ["master", "dispatch"])
+def test_engines_same_bytes_tokens(engine):
+    text = TEXT.encode()
+    scanner = Lexer(TOKENS, engine=engine).bytes_scanner()
+    reference = Lexer(TOKENS, engine="regex").bytes_scanner()
+    assert [scanner.match(text, pos) for pos in range(len(text) + 1)] == \
+           [reference.match(text, pos) for pos in range(len(text) + 1)]
+
+
+@pytest.mark.parametrize("count", [5, 60, 240])
+def test_master_scaling(count):
+    tokens, text = keywords(count)
+    lexer = Lexer(tokens, engine="master")
+    starts = [token.start for token in lexer.tokenize(text)][:-1]
+    tried = sum(lexer._scanner.tried(text, pos) for pos in starts)
+    # The master match, and at most the identifier pattern after a keyword
+    assert tried <= 2 * len(starts)
+    assert spans(lexer.tokenize(text)) == spans(Lexer(tokens, engine="regex").tokenize(text))
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from parsepy.lexer import Lexer
+from parsepy.lexer.error import LexerError
+
+
+class Reader:
+    """
+    Reader giving its text in chunks of a fixed size, whatever size is asked for.
+    """
+
+    def __init__(self, text, size):
+        self.text = text
+        self.size = size
+        self.pos = 0
+
+    async def read(self, n):
+        chunk = self.text[self.pos:self.pos + self.size]
+        self.pos += len(chunk)
+        return chunk
+
+
+def lexer():
+    return Lexer({"id": r"[a-z]+", "q": r"'", "str": r"'[^']*'", "ws": r"\s+"}, {"ws": lambda a: None})
+
+
+def spans(tokens):
+    return [(t.type, t.text, t.start, t.end, t.line, t.col) for t in tokens]
+
+
+async def collect(t_iter):
+    return [token async for token in t_iter]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64])
+def test_async_token_across_chunks(size):
+    text = "\n".join("ab 'c d' efgh" for _ in range(50))
+    lx = lexer()
+    tokens = asyncio.run(collect(lx.tokenize_async(Reader(text, size), "t", lookahead=16)))
+    assert spans(tokens) == spans(lx.tokenize(text, "t"))
+
+
+def test_async_bytes_across_chunks():
+    text = "ab 'éé' cd"
+    lx = lexer()
+    tokens = asyncio.run(collect(lx.tokenize_async(Reader(text.encode(), 1), "t", lookahead=16)))
+    assert [t.text for t in tokens] == ["ab", "'éé'", "cd", ""]
+
+
+def test_async_token_longer_than_lookahead():
+    text = "x '" + "a" * 100 + "' y"
+    lx = lexer()
+    with pytest.raises(LexerError):
+        asyncio.run(collect(lx.tokenize_async(Reader(text, 10), "t", lookahead=16)))
+
+
+@pytest.mark.parametrize("size", [1, 5, 40])
+def test_feed_keeps_buffer_bounded(size):
+    text = "\n".join("ab 'c d' efgh" for _ in range(50))
+    stream = lexer().tokenize_stream(None, "t", lookahead=16)
+    tokens = []
+    for n in range(0, len(text), size):
+        stream.feed(text[n:n + size])
+        assert stream.pos <= 16 and len(stream.buf) <= 2 * 16 + size
+        token = stream.scan()
+        while token is not None:
+            tokens.append(token)
+            token = stream.scan()
+    stream.close()
+    tokens += list(stream)
+    assert spans(tokens) == spans(lexer().tokenize(text, "t"))